@@ -0,0 +1,195 @@
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from app.config import settings
+from app.utils.errors import logger
+from typing import Dict, List, Optional
+import orjson
+
+
+# TTL de las verificaciones de pertenencia (segundos)
+OWNERSHIP_TTL = 60
+
+# TTL de las filas de boards/users usadas para enriquecer tareas (segundos)
+ENRICHMENT_TTL = 60
+
+# TTL de las páginas de GET /tasks ya serializadas (segundos)
+TASK_LIST_TTL = 30
+
+
+class RedisCache:
+    """
+    Cliente de Redis compartido.
+    Si REDIS_URL no está configurado, el caché queda deshabilitado
+    y todas las operaciones se comportan como un miss.
+    """
+    
+    _client: Optional[aioredis.Redis] = None
+    
+    @classmethod
+    def get_client(cls) -> Optional[aioredis.Redis]:
+        """Retorna el cliente de Redis o None si no hay REDIS_URL"""
+        if cls._client is None and settings.REDIS_URL:
+            cls._client = aioredis.from_url(settings.REDIS_URL)
+        
+        return cls._client
+
+
+async def cache_get(key: str) -> Optional[bytes]:
+    """Obtiene un valor del caché. Cualquier error de Redis cuenta como miss."""
+    client = RedisCache.get_client()
+    if client is None:
+        return None
+    
+    try:
+        return await client.get(key)
+    except RedisError as e:
+        logger.warning("Error leyendo caché: %s", e)
+        return None
+
+
+async def cache_set(key: str, value, ttl: int) -> None:
+    """Guarda un valor en el caché con TTL. Los errores se ignoran."""
+    client = RedisCache.get_client()
+    if client is None:
+        return
+    
+    try:
+        await client.setex(key, ttl, value)
+    except RedisError as e:
+        logger.warning("Error escribiendo caché: %s", e)
+
+
+async def cache_get_many(keys: List[str]) -> List[Optional[bytes]]:
+    """Obtiene varios valores con un solo MGET. Ante cualquier error, todo es miss."""
+    client = RedisCache.get_client()
+    if client is None or not keys:
+        return [None] * len(keys)
+    
+    try:
+        return await client.mget(keys)
+    except RedisError as e:
+        logger.warning("Error leyendo caché: %s", e)
+        return [None] * len(keys)
+
+
+async def cache_set_many(values: Dict[str, bytes], ttl: int) -> None:
+    """Guarda varios valores con TTL en un solo pipeline. Los errores se ignoran."""
+    client = RedisCache.get_client()
+    if client is None or not values:
+        return
+    
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            for key, value in values.items():
+                pipe.setex(key, ttl, value)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning("Error escribiendo caché: %s", e)
+
+
+async def cache_delete(*keys: str) -> None:
+    """Elimina claves del caché. Los errores se ignoran."""
+    client = RedisCache.get_client()
+    if client is None or not keys:
+        return
+    
+    try:
+        await client.delete(*keys)
+    except RedisError as e:
+        logger.warning("Error invalidando caché: %s", e)
+
+
+# =====================================================
+# FILAS PARA ENRIQUECER TAREAS
+# =====================================================
+
+def _enrichment_key(table: str, object_id) -> str:
+    return f"enrich:{table}:{object_id}"
+
+
+async def get_cached_rows(table: str, ids: List) -> Dict:
+    """Filas de `table` ya cacheadas, indexadas por id. Los ids ausentes son miss."""
+    values = await cache_get_many([_enrichment_key(table, object_id) for object_id in ids])
+    return {
+        object_id: orjson.loads(value)
+        for object_id, value in zip(ids, values)
+        if value is not None
+    }
+
+
+async def cache_rows(table: str, rows: List[dict]) -> None:
+    """Cachea filas de `table` (deben incluir "id") durante ENRICHMENT_TTL"""
+    await cache_set_many(
+        {_enrichment_key(table, row["id"]): orjson.dumps(row) for row in rows},
+        ENRICHMENT_TTL
+    )
+
+
+async def invalidate_row(table: str, object_id) -> None:
+    """Descarta la fila cacheada tras modificarla o eliminarla"""
+    await cache_delete(_enrichment_key(table, object_id))
+
+
+# =====================================================
+# LISTADOS DE TAREAS SERIALIZADOS
+# Cada usuario tiene un número de versión; las claves de las páginas lo
+# incluyen, así una escritura invalida todas sus páginas con un INCR
+# en lugar de buscar y borrar claves por prefijo
+# =====================================================
+
+def _task_list_version_key(user_id: str) -> str:
+    return f"tasks:ver:{user_id}"
+
+
+async def task_list_cache_key(user_id: str, *params) -> Optional[str]:
+    """
+    Clave de una página de tareas para la versión actual del usuario.
+    None si el caché está deshabilitado o Redis no responde.
+    """
+    client = RedisCache.get_client()
+    if client is None:
+        return None
+    
+    try:
+        version = await client.get(_task_list_version_key(user_id))
+    except RedisError as e:
+        logger.warning("Error leyendo caché: %s", e)
+        return None
+    
+    version = int(version) if version else 0
+    return f"tasks:list:{user_id}:{version}:" + ":".join(str(p) for p in params)
+
+
+async def invalidate_task_lists(user_id: str) -> None:
+    """Invalida todas las páginas cacheadas del usuario"""
+    client = RedisCache.get_client()
+    if client is None:
+        return
+    
+    try:
+        await client.incr(_task_list_version_key(user_id))
+    except RedisError as e:
+        logger.warning("Error invalidando caché: %s", e)
+
+
+# =====================================================
+# VERIFICACIONES DE PERTENENCIA
+# =====================================================
+
+def _ownership_key(kind: str, user_id: str, object_id) -> str:
+    return f"own:{kind}:{user_id}:{object_id}"
+
+
+async def is_owner_cached(kind: str, user_id: str, object_id) -> bool:
+    """True si ya se verificó recientemente que el objeto pertenece al usuario"""
+    return await cache_get(_ownership_key(kind, user_id, object_id)) is not None
+
+
+async def remember_owner(kind: str, user_id: str, object_id) -> None:
+    """Recuerda que el objeto pertenece al usuario durante OWNERSHIP_TTL"""
+    await cache_set(_ownership_key(kind, user_id, object_id), "1", OWNERSHIP_TTL)
+
+
+async def forget_owner(kind: str, user_id: str, object_id) -> None:
+    """Olvida la pertenencia verificada (al borrar el objeto)"""
+    await cache_delete(_ownership_key(kind, user_id, object_id))
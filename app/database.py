@@ -1,67 +1,168 @@
 from supabase import create_client, Client
+from starlette.concurrency import run_in_threadpool
 from app.config import settings
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from datetime import date, datetime, time
+from uuid import UUID
+import asyncpg
 
 
 class SupabaseClient:
     """
-    Cliente de Supabase - Nueva instancia por request.
+    Clientes de Supabase compartidos por todo el proceso.
+    
+    Reutilizar la misma instancia mantiene vivo el pool de conexiones
+    keep-alive de httpx en lugar de abrir una sesión nueva por request.
+    Los clientes compartidos NUNCA deben iniciar sesión (sign_in/sign_up):
+    eso cambiaría el token usado por PostgREST para todos los requests.
+    Para esos flujos usar create_auth_client().
     """
     
-    _service_client: Client = None
+    _client: Optional[Client] = None
+    _service_client: Optional[Client] = None
+    
+    @classmethod
+    def get_client(cls) -> Client:
+        """
+        Retorna el cliente de Supabase con anon key.
+        """
+        if cls._client is None:
+            cls._client = create_client(
+                supabase_url=settings.SUPABASE_URL,
+                supabase_key=settings.SUPABASE_ANON_KEY
+            )
+        
+        return cls._client
     
     @classmethod
     def get_service_client(cls) -> Client:
         """
         Retorna el cliente de Supabase con service role key.
-        Este SÍ puede ser singleton porque solo hace operaciones admin.
         """
         if cls._service_client is None:
             cls._service_client = create_client(
                 supabase_url=settings.SUPABASE_URL,
                 supabase_key=settings.SUPABASE_SERVICE_KEY
             )
-            # ✅ IMPORTANTE: Asegurar que no hay sesión activa
-            try:
-                cls._service_client.auth.sign_out()
-            except:
-                pass
         
         return cls._service_client
 
 
+class PostgresPool:
+    """
+    Pool de conexiones asyncpg compartido por todo el proceso.
+    
+    Solo para lecturas calientes: habla el protocolo binario de Postgres
+    sin pasar por PostgREST. Auth y escrituras siguen usando Supabase.
+    Si DATABASE_URL no está configurado el pool no existe y los endpoints
+    usan el cliente de Supabase.
+    """
+    
+    _pool: Optional[asyncpg.Pool] = None
+    
+    # Parámetros del connection string que entienden otros clientes
+    # (Prisma) pero que asyncpg mandaría al servidor como settings
+    _IGNORED_PARAMS = {"pgbouncer", "connection_limit"}
+    
+    @classmethod
+    def _dsn(cls) -> str:
+        parts = urlsplit(settings.DATABASE_URL)
+        query = [(k, v) for k, v in parse_qsl(parts.query) if k not in cls._IGNORED_PARAMS]
+        return urlunsplit(parts._replace(query=urlencode(query)))
+    
+    @classmethod
+    async def connect(cls) -> None:
+        """Crea el pool al iniciar la aplicación"""
+        if cls._pool is None and settings.DATABASE_URL:
+            cls._pool = await asyncpg.create_pool(
+                cls._dsn(),
+                min_size=settings.DB_POOL_MIN_SIZE,
+                max_size=settings.DB_POOL_MAX_SIZE,
+                max_inactive_connection_lifetime=settings.DB_POOL_MAX_INACTIVE_LIFETIME,
+                statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE
+            )
+    
+    @classmethod
+    async def close(cls) -> None:
+        """Cierra el pool al apagar la aplicación"""
+        if cls._pool is not None:
+            await cls._pool.close()
+            cls._pool = None
+    
+    @classmethod
+    def get_pool(cls) -> Optional[asyncpg.Pool]:
+        return cls._pool
+
+
 def get_supabase() -> Client:
     """
-    Dependencia de FastAPI para obtener el cliente de Supabase.
-    IMPORTANTE: Crea una NUEVA instancia por cada request para evitar
-    conflictos de sesión cuando múltiples usuarios están autenticados.
+    Dependencia de FastAPI para obtener el cliente de Supabase (anon key).
+    Retorna siempre la misma instancia.
     """
-    return create_client(
-        supabase_url=settings.SUPABASE_URL,
-        supabase_key=settings.SUPABASE_ANON_KEY
-    )
+    return SupabaseClient.get_client()
 
 
 def get_service_supabase() -> Client:
     """
     Dependencia para obtener el cliente con service role.
     Solo usar cuando sea absolutamente necesario.
+    Retorna siempre la misma instancia.
+    """
+    return SupabaseClient.get_service_client()
+
+
+def get_pg_pool() -> Optional[asyncpg.Pool]:
+    """
+    Dependencia para obtener el pool de asyncpg.
+    Retorna None si DATABASE_URL no está configurado.
+    """
+    return PostgresPool.get_pool()
+
+
+def create_auth_client() -> Client:
+    """
+    Crea un cliente desechable para operaciones que abren una sesión
+    (sign_up, sign_in_with_password, sign_in_with_id_token).
     
-    IMPORTANTE: Siempre crea una NUEVA instancia para evitar
-    contaminación de sesión entre requests.
+    IMPORTANTE: No usar los clientes compartidos para esto, la sesión
+    contaminaría los requests de otros usuarios.
     """
-    # ✅ CREAR NUEVA INSTANCIA EN CADA REQUEST
-    client = create_client(
+    return create_client(
         supabase_url=settings.SUPABASE_URL,
-        supabase_key=settings.SUPABASE_SERVICE_KEY
+        supabase_key=settings.SUPABASE_ANON_KEY
     )
-    
-    # ✅ Asegurar que no hay sesión activa
-    try:
-        client.auth.sign_out()
-    except:
-        pass
-    
-    return client
+
+
+async def run_query(query):
+    """
+    Ejecuta un query builder de supabase-py en el threadpool.
+    supabase-py es síncrono: llamar .execute() directo en un endpoint
+    async bloquea el event loop durante todo el round-trip.
+    """
+    return await run_in_threadpool(query.execute)
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """
+    Ejecuta cualquier otra llamada bloqueante (auth, storage, CPU) en el
+    threadpool de anyio, dimensionado con THREADPOOL_SIZE.
+    """
+    return await run_in_threadpool(fn, *args, **kwargs)
+
+
+def record_to_dict(record: asyncpg.Record) -> dict:
+    """
+    Convierte una fila de asyncpg al mismo formato que devuelve PostgREST:
+    uuid, date y time como texto; timestamps se dejan como datetime.
+    """
+    row = dict(record)
+    for key, value in row.items():
+        if isinstance(value, UUID):
+            row[key] = str(value)
+        elif isinstance(value, (date, time)) and not isinstance(value, datetime):
+            row[key] = value.isoformat()
+    return row
 
 
 async def test_connection() -> bool:
@@ -70,7 +171,7 @@ async def test_connection() -> bool:
     """
     try:
         client = get_supabase()
-        response = client.table('users').select("id").limit(1).execute()
+        response = await run_query(client.table('users').select("id").limit(1))
         print("Conexión a Supabase exitosa")
         return True
     except Exception as e:
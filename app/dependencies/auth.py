@@ -1,9 +1,11 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from supabase import Client
-from app.database import get_supabase
+from app.database import get_supabase, run_query
 from typing import Optional, Dict
+from functools import lru_cache
 import jwt
+import time
 from app.config import settings
 
 
@@ -11,6 +13,22 @@ from app.config import settings
 security = HTTPBearer()
 
 
+@lru_cache(maxsize=8192)
+def _decode_token(token: str) -> Dict:
+    """
+    Verifica la firma y decodifica el token una sola vez por token.
+    Un token nunca cambia, así que el resultado se puede cachear; la
+    expiración NO se valida aquí sino en cada request (verify_token).
+    Los tokens inválidos lanzan excepción y no quedan en el caché.
+    """
+    return jwt.decode(
+        token,
+        settings.SECRET_KEY,
+        algorithms=[settings.ALGORITHM],
+        options={"verify_exp": False}
+    )
+
+
 class AuthDependency:
 
     @staticmethod
@@ -29,12 +47,12 @@ class AuthDependency:
             HTTPException: Si el token es inválido o ha expirado
         """
         try:
-            # Decodificar el token
-            payload = jwt.decode(
-                token,
-                settings.SECRET_KEY,
-                algorithms=[settings.ALGORITHM]
-            )
+            # Decodificar el token (firma cacheada) y validar expiración
+            payload = _decode_token(token)
+            
+            exp = payload.get("exp")
+            if exp is not None and exp <= time.time():
+                raise jwt.ExpiredSignatureError("Signature has expired")
             
             # VALIDAR EL TIPO DE TOKEN
             token_type_in_payload = payload.get("type")
@@ -136,7 +154,7 @@ class AuthDependency:
         """
         try:
             # Obtener datos del usuario desde la tabla users
-            response = supabase.table("users").select("*").eq("id", user_id).single().execute()
+            response = await run_query(supabase.table("users").select("*").eq("id", user_id).single())
             
             if not response.data:
                 raise HTTPException(
@@ -1,8 +1,10 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from app.config import settings
-from app.database import test_connection
+from app.database import PostgresPool, test_connection
+from anyio.to_thread import current_default_thread_limiter
 import uvicorn
 
 
@@ -13,7 +15,8 @@ app = FastAPI(
     version=settings.VERSION,
     docs_url=f"{settings.API_V1_PREFIX}/docs",
     redoc_url=f"{settings.API_V1_PREFIX}/redoc",
-    openapi_url=f"{settings.API_V1_PREFIX}/openapi.json"
+    openapi_url=f"{settings.API_V1_PREFIX}/openapi.json",
+    default_response_class=ORJSONResponse
 )
 
 
@@ -27,6 +30,27 @@ app.add_middleware(
 )
 
 
+# Comprimir respuestas grandes (listas de tareas, notificaciones).
+# Por debajo de 1 KB el costo de comprimir no compensa
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+
+# Rechazar cuerpos demasiado grandes antes de leerlos.
+# Tiene que ser middleware: FastAPI parsea el multipart antes de
+# ejecutar el endpoint y sus dependencias.
+@app.middleware("http")
+async def limit_request_body(request: Request, call_next):
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.MAX_REQUEST_BODY_SIZE:
+        return JSONResponse(
+            status_code=413,
+            content={
+                "detail": f"El archivo excede el tamaño máximo de {settings.MAX_REQUEST_BODY_SIZE // (1024*1024)}MB"
+            }
+        )
+    return await call_next(request)
+
+
 # =====================================================
 # EVENT HANDLERS
 # =====================================================
@@ -43,9 +67,15 @@ async def startup_event():
     print(f"Entorno: {settings.ENVIRONMENT}")
     print("="*50 + "\n")
     
+    # Ajustar el threadpool al tamaño del pool de conexiones de Supabase
+    current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+    
     # Probar conexión a Supabase
     await test_connection()
     
+    # Pool de asyncpg para lecturas (solo si hay DATABASE_URL)
+    await PostgresPool.connect()
+    
     print("\nAplicación iniciada correctamente")
     print(f"Documentación: http://localhost:8000{settings.API_V1_PREFIX}/docs")
     print("="*50 + "\n")
@@ -55,6 +85,7 @@ async def startup_event():
 async def shutdown_event():
 
     print("\nCerrando aplicación...")
+    await PostgresPool.close()
 
 
 # =====================================================
@@ -186,5 +217,7 @@ if __name__ == "__main__":
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=settings.DEBUG
+        reload=settings.DEBUG,
+        loop="uvloop",
+        http="httptools"
     )
\ No newline at end of file
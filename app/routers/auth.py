@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from supabase import Client
-from app.database import get_service_supabase, get_supabase
+from postgrest.exceptions import APIError
+from app.database import get_service_supabase, get_supabase, create_auth_client, run_query, run_blocking
 from app.schemas.auth import (
     RegisterRequest,
     LoginRequest,
@@ -12,9 +13,12 @@ from app.schemas.auth import (
     RefreshTokenRequest
 )
 from app.dependencies.auth import get_current_user, get_current_user_id
+from app.utils.http_cache import build_etag, check_not_modified
+from app.cache import invalidate_row
 from typing import Dict
 import jwt
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
 from app.config import settings
 from pydantic import BaseModel
 
@@ -33,6 +37,12 @@ class GoogleAuthRequest(BaseModel):
 # =====================================================
 # HELPER FUNCTIONS
 # =====================================================
+_ACCESS_TEMPLATE = {"type": "access"}
+_REFRESH_TEMPLATE = {"type": "refresh"}
+_ACCESS_TTL = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+_REFRESH_TTL = settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60
+
+
 def create_access_token(user_id: str, email: str) -> tuple[str, int]:
     """
     Crea un JWT token de acceso.
@@ -40,15 +50,13 @@ def create_access_token(user_id: str, email: str) -> tuple[str, int]:
     Returns:
         tuple: (token, expires_in_seconds)
     """
-    expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    expires_in = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60  
-    
+    now = int(time.time())
     to_encode = {
         "sub": user_id,
         "email": email,
-        "exp": expire,
-        "iat": datetime.utcnow(),
-        "type": "access"
+        "exp": now + _ACCESS_TTL,
+        "iat": now,
+        **_ACCESS_TEMPLATE
     }
     
     encoded_jwt = jwt.encode(
@@ -57,7 +65,7 @@ def create_access_token(user_id: str, email: str) -> tuple[str, int]:
         algorithm=settings.ALGORITHM
     )
     
-    return encoded_jwt, expires_in
+    return encoded_jwt, _ACCESS_TTL
 
 
 def create_refresh_token(user_id: str, email: str) -> tuple[str, int]:
@@ -67,15 +75,13 @@ def create_refresh_token(user_id: str, email: str) -> tuple[str, int]:
     Returns:
         tuple: (token, expires_in_seconds)
     """
-    expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    expires_in = settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60
-    
+    now = int(time.time())
     to_encode = {
         "sub": user_id,
         "email": email,
-        "exp": expire,
-        "iat": datetime.utcnow(),
-        "type": "refresh"
+        "exp": now + _REFRESH_TTL,
+        "iat": now,
+        **_REFRESH_TEMPLATE
     }
     
     encoded_jwt = jwt.encode(
@@ -84,7 +90,12 @@ def create_refresh_token(user_id: str, email: str) -> tuple[str, int]:
         algorithm=settings.ALGORITHM
     )
     
-    return encoded_jwt, expires_in
+    return encoded_jwt, _REFRESH_TTL
+
+
+def _norm(value: str) -> str:
+    """Normaliza strings opcionales para compararlos (None -> "", sin espacios)"""
+    return (value or "").strip()
 
 
 async def create_user_profile(supabase: Client, user_id: str, email: str, full_name: str = None, phone: str = None, avatar_url: str = None) -> Dict:
@@ -102,7 +113,7 @@ async def create_user_profile(supabase: Client, user_id: str, email: str, full_n
         
         #print(f" Insertando user_data: {user_data}")
         
-        response = supabase.table("users").insert(user_data).execute()
+        response = await run_query(supabase.table("users").insert(user_data))
         
         #print(f" Response from insert: {response}")
         #print(f" Response.data: {response.data}")
@@ -169,14 +180,10 @@ async def register(
         #print(f"Intentando registrar usuario: {data.email}")
         
         # Crear cliente temporal para registro
-        from supabase import create_client
-        temp_client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_ANON_KEY
-        )
+        temp_client = create_auth_client()
         
         # ✅ Registrar con metadata - el trigger creará el perfil automáticamente
-        auth_response = temp_client.auth.sign_up({
+        auth_response = await run_blocking(temp_client.auth.sign_up, {
             "email": data.email,
             "password": data.password,
             "options": {
@@ -209,7 +216,7 @@ async def register(
         
         
         try:
-            profile_response = service_client.table("users").select("*").eq("id", user_id).single().execute()
+            profile_response = await run_query(service_client.table("users").select("*").eq("id", user_id).single())
             
             if profile_response.data:
                 user_profile = profile_response.data
@@ -298,18 +305,13 @@ async def login(
     
     try:
         #Usar Service Role para verificar usuario sin establecer sesión
-        from app.database import get_service_supabase
         service_client = get_service_supabase()
         
         # Crear cliente temporal SOLO para verificar la contraseña
-        from supabase import create_client
-        temp_client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_ANON_KEY
-        )
+        temp_client = create_auth_client()
         
         # Verificar credenciales
-        auth_response = temp_client.auth.sign_in_with_password({
+        auth_response = await run_blocking(temp_client.auth.sign_in_with_password, {
             "email": data.email,
             "password": data.password
         })
@@ -328,9 +330,9 @@ async def login(
         
         # ✅ Obtener perfil usando SERVICE CLIENT (sin RLS)
         try:
-            profile_response = service_client.table("users").select("*").eq("id", user_id).single().execute()
+            profile_response = await run_query(service_client.table("users").select("*").eq("id", user_id).single())
             user_profile = profile_response.data if profile_response.data else {}
-        except:
+        except APIError:
             user_profile = await create_user_profile(service_client, user_id, user_email)
         
         # Generar tokens JWT propios
@@ -383,6 +385,7 @@ async def login(
 )
 async def refresh_token(
     data: RefreshTokenRequest,
+    include_boards: bool = Query(False, description="Incluir los boards del usuario con su conteo de tareas"),
     supabase: Client = Depends(get_service_supabase)
 ):
     """
@@ -390,6 +393,9 @@ async def refresh_token(
     
     Este endpoint permite mantener la sesión del usuario sin necesidad de
     volver a hacer login cuando el access token expira.
+    
+    El perfil y los boards se obtienen con una sola llamada a la función
+    `refresh_bundle`, así el cliente no necesita pedir /boards después.
     """
     try:
         # Decodificar y validar refresh token
@@ -415,15 +421,15 @@ async def refresh_token(
                 detail="Token inválido: información de usuario incompleta"
             )
         
-        # Verificar que el usuario aún exista en la base de datos
+        # Verificar que el usuario aún exista y traer sus boards en un solo RTT
         try:
-            profile_response = supabase.table("users").select("*").eq("id", user_id).single().execute()
-            if not profile_response.data:
+            bundle = (await run_query(supabase.rpc("refresh_bundle", {"uid": user_id}))).data
+            if not bundle or not bundle.get("user"):
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Usuario no encontrado"
                 )
-            user_profile = profile_response.data
+            user_profile = bundle["user"]
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -448,7 +454,8 @@ async def refresh_token(
             refresh_token=new_refresh_token,
             token_type="bearer",
             expires_in=access_expires,
-            user=user_response
+            user=user_response,
+            boards=bundle.get("boards") if include_boards else None
         )
         
     except jwt.ExpiredSignatureError:
@@ -489,11 +496,13 @@ async def google_auth(
     try:
         #print(f"Intento de login con Google")
         
-        # Autenticar con Google usando Supabase
-        auth_response = supabase.auth.sign_in_with_id_token({
+        # Autenticar con Google en un cliente temporal (abre una sesión)
+        temp_client = create_auth_client()
+        auth_response = await run_blocking(temp_client.auth.sign_in_with_id_token, {
             "provider": "google",
             "token": data.id_token
         })
+        del temp_client
         
         if not auth_response.user:
             raise HTTPException(
@@ -513,16 +522,22 @@ async def google_auth(
         
         # Verificar si el perfil existe en la tabla users
         try:
-            profile_response = supabase.table("users").select("*").eq("id", user_id).single().execute()
+            profile_response = await run_query(supabase.table("users").select("*").eq("id", user_id).single())
             user_profile = profile_response.data
             
-            # Si existe, actualizar avatar si es necesario
-            if avatar_url and user_profile.get("avatar_url") != avatar_url:
-                update_response = supabase.table("users").update({
-                    "avatar_url": avatar_url,
-                    "full_name": full_name or user_profile.get("full_name")
-                }).eq("id", user_id).execute()
+            # Si existe, actualizar avatar solo si realmente cambió
+            new_avatar = _norm(avatar_url)
+            new_name = _norm(full_name)
+            changed = {}
+            if new_avatar and new_avatar != _norm(user_profile.get("avatar_url")):
+                changed["avatar_url"] = new_avatar
+                if new_name and new_name != _norm(user_profile.get("full_name")):
+                    changed["full_name"] = new_name
+            
+            if changed:
+                update_response = await run_query(supabase.table("users").update(changed).eq("id", user_id))
                 user_profile = update_response.data[0] if update_response.data else user_profile
+                await invalidate_row("users", user_id)
                 
         except Exception as profile_error:
             # Si no existe perfil, crearlo
@@ -593,21 +608,13 @@ async def google_auth(
     }
 )
 async def logout(
-    user_id: str = Depends(get_current_user_id),
-    supabase: Client = Depends(get_service_supabase)
+    user_id: str = Depends(get_current_user_id)
 ):
-    try:
-        # Cerrar sesión en Supabase
-        supabase.auth.sign_out()
-        
-        return MessageResponse(
-            message="Sesión cerrada exitosamente"
-        )
-    except Exception as e:
-        # Incluso si falla, consideramos que se cerró la sesión
-        return MessageResponse(
-            message="Sesión cerrada exitosamente"
-        )
+    # Los tokens son JWT propios sin estado: no hay sesión de Supabase
+    # que cerrar, y hacer sign_out en el cliente compartido lo reiniciaría
+    return MessageResponse(
+        message="Sesión cerrada exitosamente"
+    )
 
 
 @router.get(
@@ -617,13 +624,21 @@ async def logout(
     description="Retorna la información del usuario autenticado",
     responses={
         200: {"description": "Información del usuario"},
+        304: {"description": "Sin cambios desde el último ETag"},
         401: {"model": ErrorResponse, "description": "No autenticado"},
         404: {"model": ErrorResponse, "description": "Usuario no encontrado"}
     }
 )
 async def get_me(
+    request: Request,
+    response: Response,
     current_user: Dict = Depends(get_current_user)
 ):
+    etag = build_etag(current_user.get("id"), current_user.get("updated_at"))
+    not_modified = check_not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
+    
     return UserResponse(
         id=current_user.get("id"),
         email=current_user.get("email"),
@@ -670,13 +685,7 @@ async def update_profile(
 ):
     try:
         # Construir objeto de actualización solo con campos proporcionados
-        update_data = {}
-        if data.full_name is not None:
-            update_data["full_name"] = data.full_name
-        if data.phone is not None:
-            update_data["phone"] = data.phone
-        if data.avatar_url is not None:
-            update_data["avatar_url"] = data.avatar_url
+        update_data = data.model_dump(exclude_none=True)
         
         if not update_data:
             raise HTTPException(
@@ -685,7 +694,7 @@ async def update_profile(
             )
         
         # Actualizar en la base de datos
-        response = supabase.table("users").update(update_data).eq("id", user_id).execute()
+        response = await run_query(supabase.table("users").update(update_data).eq("id", user_id))
         
         if not response.data:
             raise HTTPException(
@@ -693,6 +702,7 @@ async def update_profile(
                 detail="Usuario no encontrado"
             )
         
+        await invalidate_row("users", user_id)
         updated_user = response.data[0]
         
         return UserResponse(
@@ -723,11 +733,10 @@ async def test_service_client():
     Endpoint temporal de debug - ELIMINAR en producción
     """
     try:
-        from app.database import get_service_supabase
         service_client = get_service_supabase()
         
         # Probar lectura
-        users = service_client.table("users").select("id").limit(1).execute()
+        users = await run_query(service_client.table("users").select("id").limit(1))
         
         return {
             "status": "success",
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from supabase import Client
-from app.database import get_service_supabase, get_service_supabase
+from app.database import get_service_supabase, run_query
 from app.schemas.boards import (
     BoardCreate,
     BoardUpdate,
@@ -8,6 +8,8 @@ from app.schemas.boards import (
     BoardWithTaskCount
 )
 from app.dependencies.auth import get_current_user_id
+from app.utils.http_cache import build_etag, check_not_modified, fetch_change_marker
+from app.cache import invalidate_row, invalidate_task_lists
 from typing import List
 
 
@@ -20,20 +22,34 @@ router = APIRouter()
 
 @router.get("/", response_model=List[BoardWithTaskCount])
 async def get_boards(
+    request: Request,
+    response: Response,
     user_id: str = Depends(get_current_user_id),
     supabase: Client = Depends(get_service_supabase)  
 ):
     """
     Obtiene todos los boards del usuario con contador de tareas.
+    Responde 304 si ni los boards ni las tareas cambiaron desde el último ETag.
     """
     try:
-        boards_response = supabase.table("boards").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
+        boards_response = await run_query(supabase.table("boards").select("*").eq("user_id", user_id).order("created_at", desc=True))
         
+        # Huella de las tareas: afecta task_count
+        tasks_marker = await fetch_change_marker(supabase, "tasks", user_id)
+        
+        etag = build_etag(
+            user_id,
+            *(f"{board['id']}:{board.get('updated_at')}" for board in boards_response.data),
+            *tasks_marker
+        )
+        not_modified = check_not_modified(request, response, etag)
+        if not_modified:
+            return not_modified
         
         boards_with_count = []
         
         for board in boards_response.data:
-            tasks_count = supabase.table("tasks").select("id", count="exact").eq("board_id", board["id"]).execute()
+            tasks_count = await run_query(supabase.table("tasks").select("id", count="exact").eq("board_id", board["id"]))
             
             board_data = {
                 **board,
@@ -81,7 +97,7 @@ async def create_board(
             "type": board_data.type
         }
         
-        response = supabase.table("boards").insert(new_board).execute()
+        response = await run_query(supabase.table("boards").insert(new_board))
         
         if not response.data:
             raise HTTPException(
@@ -118,7 +134,7 @@ async def get_board(
     """
     try:
         # Obtener board
-        board_response = supabase.table("boards").select("*").eq("id", board_id).eq("user_id", user_id).single().execute()
+        board_response = await run_query(supabase.table("boards").select("*").eq("id", board_id).eq("user_id", user_id).single())
         
         if not board_response.data:
             raise HTTPException(
@@ -127,7 +143,7 @@ async def get_board(
             )
         
         # Contar tareas
-        tasks_count = supabase.table("tasks").select("id", count="exact").eq("board_id", board_id).execute()
+        tasks_count = await run_query(supabase.table("tasks").select("id", count="exact").eq("board_id", board_id))
         
         board_data = {
             **board_response.data,
@@ -163,7 +179,7 @@ async def update_board(
     """
     try:
         # Verificar que el board existe y pertenece al usuario
-        board_check = supabase.table("boards").select("id").eq("id", board_id).eq("user_id", user_id).execute()
+        board_check = await run_query(supabase.table("boards").select("id").eq("id", board_id).eq("user_id", user_id))
         
         if not board_check.data:
             raise HTTPException(
@@ -172,15 +188,7 @@ async def update_board(
             )
         
         # Construir objeto de actualización
-        update_data = {}
-        if board_data.name is not None:
-            update_data["name"] = board_data.name
-        if board_data.color is not None:
-            update_data["color"] = board_data.color
-        if board_data.icon is not None:
-            update_data["icon"] = board_data.icon
-        if board_data.type is not None:
-            update_data["type"] = board_data.type
+        update_data = board_data.model_dump(exclude_none=True)
         
         if not update_data:
             raise HTTPException(
@@ -189,7 +197,7 @@ async def update_board(
             )
         
         # Actualizar
-        response = supabase.table("boards").update(update_data).eq("id", board_id).execute()
+        response = await run_query(supabase.table("boards").update(update_data).eq("id", board_id))
         
         if not response.data:
             raise HTTPException(
@@ -197,6 +205,9 @@ async def update_board(
                 detail="No se pudo actualizar el tablero"
             )
         
+        await invalidate_row("boards", board_id)
+        await invalidate_task_lists(user_id)
+        
         #print(f"Board actualizado: {board_id}")
         return response.data[0]
         
@@ -226,17 +237,23 @@ async def delete_board(
     Las tareas asociadas quedarán con board_id = null.
     """
     try:
-        # Verificar que el board existe y pertenece al usuario
-        board_check = supabase.table("boards").select("id").eq("id", board_id).eq("user_id", user_id).execute()
+        # Borrado condicional: si no devuelve filas, el board no existía
+        # o no es del usuario
+        response = await run_query(
+            supabase.table("boards")
+            .delete()
+            .eq("id", board_id)
+            .eq("user_id", user_id)
+        )
         
-        if not board_check.data:
+        if not response.data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Tablero no encontrado"
             )
         
-        
-        supabase.table("boards").delete().eq("id", board_id).execute()
+        await invalidate_row("boards", board_id)
+        await invalidate_task_lists(user_id)
         
         #print(f"Board eliminado: {board_id}")
         return None
@@ -1,9 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File, Query
 from supabase import Client
-from app.database import get_service_supabase
+from app.database import get_service_supabase, run_query, run_blocking
 from app.dependencies.auth import get_current_user_id
+from app.utils.errors import api_error_to_http, logger
+from app.cache import invalidate_row
+from postgrest.exceptions import APIError
+from storage3.utils import StorageException
 from pydantic import BaseModel, Field
 from typing import Optional
+from PIL import Image, ImageOps, UnidentifiedImageError
+import asyncio
+import io
 import uuid
 import os
 
@@ -33,12 +40,32 @@ class MessageResponse(BaseModel):
     message: str
 
 
+class SignedUploadRequest(BaseModel):
+    """Schema para pedir una URL de subida directa a Storage"""
+    extension: str = Field(default=".webp", description="Extensión del archivo (.jpg, .jpeg, .png, .webp)")
+
+
+class SignedUploadResponse(BaseModel):
+    """Schema con la URL firmada para subir el avatar directo a Storage"""
+    url: str
+    token: str
+    path: str
+
+
+class AvatarCommitRequest(BaseModel):
+    """Schema para registrar un avatar ya subido a Storage"""
+    path: str = Field(..., description="Path devuelto por /avatar/signed-url")
+
+
 # =====================================================
 # CONFIGURACIÓN
 # =====================================================
 BUCKET_NAME = "avatars"
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5 MB
+READ_CHUNK_SIZE = 64 * 1024  # 64 KB
+AVATAR_MAX_EDGE = 512  # px
+AVATAR_WEBP_QUALITY = 75
 
 
 # =====================================================
@@ -67,6 +94,45 @@ def validate_image(file: UploadFile) -> None:
         )
 
 
+async def read_upload_limited(file: UploadFile) -> bytes:
+    """
+    Lee el archivo en bloques de READ_CHUNK_SIZE y corta apenas se supera
+    MAX_FILE_SIZE, sin cargar archivos gigantes completos en memoria.
+    """
+    buf = bytearray()
+    while chunk := await file.read(READ_CHUNK_SIZE):
+        if len(buf) + len(chunk) > MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"El archivo es demasiado grande. Máximo: {MAX_FILE_SIZE / (1024*1024):.1f}MB"
+            )
+        buf += chunk
+    
+    # storage3 y Pillow necesitan el archivo completo: se acumula en un solo
+    # buffer en memoria (acotado por MAX_FILE_SIZE)
+    return bytes(buf)
+
+
+def transcode_to_webp(contents: bytes) -> bytes:
+    """
+    Redimensiona la imagen a AVATAR_MAX_EDGE px por lado y la convierte a WebP.
+    Es CPU-bound: llamarla con run_blocking.
+    """
+    try:
+        with Image.open(io.BytesIO(contents)) as img:
+            # WebP no conserva el EXIF: se aplica la orientación a los píxeles
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail((AVATAR_MAX_EDGE, AVATAR_MAX_EDGE))
+            buffer = io.BytesIO()
+            img.save(buffer, "WEBP", quality=AVATAR_WEBP_QUALITY, method=6)
+            return buffer.getvalue()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El archivo no es una imagen válida"
+        )
+
+
 async def delete_old_avatar(supabase: Client, user_id: str, old_avatar_url: str) -> None:
     """Elimina el avatar anterior del storage de Supabase"""
     if not old_avatar_url:
@@ -77,13 +143,56 @@ async def delete_old_avatar(supabase: Client, user_id: str, old_avatar_url: str)
         # Formato esperado: https://[proyecto].supabase.co/storage/v1/object/public/avatars/[user_id]/[filename]
         if "/avatars/" in old_avatar_url:
             path = old_avatar_url.split("/avatars/")[1]
-            supabase.storage.from_(BUCKET_NAME).remove([path])
-            #print(f"Avatar anterior eliminado: {path}")
+            await run_blocking(supabase.storage.from_(BUCKET_NAME).remove, [path])
     except Exception as e:
-        print(f"Error al eliminar avatar anterior: {e}")
+        logger.warning("Error al eliminar avatar anterior: %s", e)
         # No lanzamos excepción, solo logueamos
 
 
+async def avatar_exists(supabase: Client, path: str) -> bool:
+    """Verifica que el archivo exista en el bucket de avatars"""
+    folder, filename = path.rsplit("/", 1)
+    files = await run_blocking(
+        supabase.storage.from_(BUCKET_NAME).list,
+        folder,
+        {"search": filename, "limit": 100}
+    )
+    return any(f.get("name") == filename for f in files)
+
+
+async def save_avatar_url(
+    supabase: Client,
+    background: BackgroundTasks,
+    user_id: str,
+    public_url: str,
+    old_avatar_url: Optional[str]
+) -> dict:
+    """
+    Guarda el nuevo avatar_url y programa el borrado del anterior
+    para después de responder. Retorna el usuario actualizado.
+    """
+    update_response = await run_query(
+        supabase.table("users").update({
+            "avatar_url": public_url
+        }).eq("id", user_id)
+    )
+    
+    if not update_response.data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Usuario no encontrado"
+        )
+    
+    await invalidate_row("users", user_id)
+    
+    # Eliminar el avatar anterior después de responder (salvo que sea el
+    # mismo archivo, p.ej. un /avatar/commit reintentado)
+    if old_avatar_url != public_url:
+        background.add_task(delete_old_avatar, supabase, user_id, old_avatar_url)
+    
+    return update_response.data[0]
+
+
 # =====================================================
 # ENDPOINTS
 # =====================================================
@@ -107,9 +216,11 @@ async def update_name(
     """Actualiza el nombre del usuario"""
     try:
         # Actualizar en la base de datos
-        response = supabase.table("users").update({
-            "full_name": data.full_name
-        }).eq("id", user_id).execute()
+        response = await run_query(
+            supabase.table("users").update({
+                "full_name": data.full_name
+            }).eq("id", user_id)
+        )
         
         if not response.data:
             raise HTTPException(
@@ -117,6 +228,7 @@ async def update_name(
                 detail="Usuario no encontrado"
             )
         
+        await invalidate_row("users", user_id)
         updated_user = response.data[0]
         
         return ProfileResponse(
@@ -127,28 +239,26 @@ async def update_name(
             message="Nombre actualizado exitosamente"
         )
         
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al actualizar nombre: {str(e)}"
-        )
+    except APIError as e:
+        raise api_error_to_http(e, "Usuario no encontrado", "Error al actualizar nombre")
 
 
 @router.post(
     "/avatar",
     response_model=ProfileResponse,
     summary="Subir/Actualizar foto de perfil",
-    description="Sube o actualiza la foto de perfil del usuario. Acepta JPG, PNG, WEBP (máx 5MB)",
+    description="Sube o actualiza la foto de perfil del usuario. Acepta JPG, PNG, WEBP (máx 5MB). Se guarda como WebP de hasta 512px",
     responses={
         200: {"description": "Avatar actualizado exitosamente"},
         401: {"description": "No autenticado"},
-        400: {"description": "Archivo inválido"}
+        400: {"description": "Archivo inválido"},
+        413: {"description": "Archivo demasiado grande"}
     }
 )
 async def upload_avatar(
+    background: BackgroundTasks,
     file: UploadFile = File(..., description="Imagen de perfil (JPG, PNG, WEBP)"),
+    keep_original: bool = Query(False, description="Subir el archivo original sin convertir a WebP"),
     user_id: str = Depends(get_current_user_id),
     supabase: Client = Depends(get_service_supabase)
 ):
@@ -157,54 +267,151 @@ async def upload_avatar(
         # Validar imagen
         validate_image(file)
         
-        # Leer contenido del archivo
-        contents = await file.read()
+        # Obtener el avatar anterior en paralelo mientras se lee el archivo
+        old_avatar_task = asyncio.create_task(run_query(
+            supabase.table("users").select("avatar_url").eq("id", user_id).single()
+        ))
         
-        # Validar tamaño
-        if len(contents) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"El archivo es demasiado grande. Máximo: {MAX_FILE_SIZE / (1024*1024):.1f}MB"
+        try:
+            # Leer el archivo por bloques validando el tamaño sobre la marcha
+            contents = await read_upload_limited(file)
+            
+            # Convertir a WebP (más liviano para storage y CDN)
+            if keep_original:
+                file_ext = get_file_extension(file.filename)
+                content_type = file.content_type
+            else:
+                contents = await run_blocking(transcode_to_webp, contents)
+                file_ext = ".webp"
+                content_type = "image/webp"
+            
+            # Generar nombre único para el archivo
+            unique_filename = f"{uuid.uuid4()}{file_ext}"
+            file_path = f"{user_id}/{unique_filename}"
+            
+            # Subir archivo a Supabase Storage
+            await run_blocking(
+                supabase.storage.from_(BUCKET_NAME).upload,
+                path=file_path,
+                file=contents,
+                file_options={
+                    "content-type": content_type,
+                    "upsert": "false"
+                }
             )
+        except BaseException:
+            old_avatar_task.cancel()
+            raise
         
-        # Obtener usuario actual para eliminar avatar anterior
-        user_response = supabase.table("users").select("avatar_url").eq("id", user_id).single().execute()
+        # Obtener URL pública del archivo (se arma localmente, sin red)
+        public_url = supabase.storage.from_(BUCKET_NAME).get_public_url(file_path)
+        
+        user_response = await old_avatar_task
         old_avatar_url = user_response.data.get("avatar_url") if user_response.data else None
         
-        # Generar nombre único para el archivo
-        file_ext = get_file_extension(file.filename)
-        unique_filename = f"{uuid.uuid4()}{file_ext}"
-        file_path = f"{user_id}/{unique_filename}"
+        # Actualizar avatar_url en la base de datos
+        updated_user = await save_avatar_url(supabase, background, user_id, public_url, old_avatar_url)
         
-        # Subir archivo a Supabase Storage
-        upload_response = supabase.storage.from_(BUCKET_NAME).upload(
-            path=file_path,
-            file=contents,
-            file_options={
-                "content-type": file.content_type,
-                "upsert": "false"
-            }
+        return ProfileResponse(
+            id=updated_user["id"],
+            email=updated_user.get("email", ""),
+            full_name=updated_user.get("full_name"),
+            avatar_url=updated_user.get("avatar_url"),
+            message="Avatar actualizado exitosamente"
         )
         
-        # Obtener URL pública del archivo
-        public_url = supabase.storage.from_(BUCKET_NAME).get_public_url(file_path)
-        
-        # Actualizar avatar_url en la base de datos
-        update_response = supabase.table("users").update({
-            "avatar_url": public_url
-        }).eq("id", user_id).execute()
-        
-        if not update_response.data:
+    except APIError as e:
+        raise api_error_to_http(e, "Usuario no encontrado", "Error al subir avatar")
+    except StorageException:
+        logger.exception("Error al subir avatar")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error al subir avatar"
+        )
+
+
+@router.post(
+    "/avatar/signed-url",
+    response_model=SignedUploadResponse,
+    summary="Obtener URL de subida directa",
+    description="Genera una URL firmada para que el cliente suba el avatar directo a Supabase Storage, sin pasar por la API",
+    responses={
+        200: {"description": "URL generada"},
+        401: {"description": "No autenticado"},
+        400: {"description": "Extensión inválida"}
+    }
+)
+async def create_avatar_upload_url(
+    data: SignedUploadRequest,
+    user_id: str = Depends(get_current_user_id),
+    supabase: Client = Depends(get_service_supabase)
+):
+    """Genera una URL firmada de subida; luego llamar a /avatar/commit"""
+    extension = data.extension.lower()
+    if extension not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Formato de archivo no permitido. Usa: {', '.join(ALLOWED_EXTENSIONS)}"
+        )
+    
+    file_path = f"{user_id}/{uuid.uuid4()}{extension}"
+    
+    try:
+        signed = await run_blocking(supabase.storage.from_(BUCKET_NAME).create_signed_upload_url, file_path)
+    except StorageException:
+        logger.exception("Error al generar URL de subida")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error al generar URL de subida"
+        )
+    
+    return SignedUploadResponse(
+        url=signed["signed_url"],
+        token=signed["token"],
+        path=file_path
+    )
+
+
+@router.post(
+    "/avatar/commit",
+    response_model=ProfileResponse,
+    summary="Registrar avatar subido directamente",
+    description="Guarda como avatar el archivo subido con la URL de /avatar/signed-url",
+    responses={
+        200: {"description": "Avatar actualizado exitosamente"},
+        401: {"description": "No autenticado"},
+        400: {"description": "Path inválido"}
+    }
+)
+async def commit_avatar(
+    data: AvatarCommitRequest,
+    background: BackgroundTasks,
+    user_id: str = Depends(get_current_user_id),
+    supabase: Client = Depends(get_service_supabase)
+):
+    """Apunta avatar_url al archivo ya subido y borra el anterior en segundo plano"""
+    # Solo se aceptan paths dentro de la carpeta del usuario
+    if not data.path.startswith(f"{user_id}/") or ".." in data.path:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Path de avatar inválido"
+        )
+    
+    try:
+        # El archivo tiene que haberse subido de verdad antes de apuntarle
+        exists, user_response = await asyncio.gather(
+            avatar_exists(supabase, data.path),
+            run_query(supabase.table("users").select("avatar_url").eq("id", user_id).single())
+        )
+        if not exists:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Usuario no encontrado"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El avatar no fue subido"
             )
+        old_avatar_url = user_response.data.get("avatar_url") if user_response.data else None
         
-        # Eliminar avatar anterior si existe
-        if old_avatar_url:
-            await delete_old_avatar(supabase, user_id, old_avatar_url)
-        
-        updated_user = update_response.data[0]
+        public_url = supabase.storage.from_(BUCKET_NAME).get_public_url(data.path)
+        updated_user = await save_avatar_url(supabase, background, user_id, public_url, old_avatar_url)
         
         return ProfileResponse(
             id=updated_user["id"],
@@ -214,13 +421,13 @@ async def upload_avatar(
             message="Avatar actualizado exitosamente"
         )
         
-    except HTTPException:
-        raise
-    except Exception as e:
-        #print(f"Error al subir avatar: {str(e)}")
+    except APIError as e:
+        raise api_error_to_http(e, "Usuario no encontrado", "Error al registrar avatar")
+    except StorageException:
+        logger.exception("Error al registrar avatar")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al subir avatar: {str(e)}"
+            detail="Error al registrar avatar"
         )
 
 
@@ -235,13 +442,14 @@ async def upload_avatar(
     }
 )
 async def delete_avatar(
+    background: BackgroundTasks,
     user_id: str = Depends(get_current_user_id),
     supabase: Client = Depends(get_service_supabase)
 ):
     """Elimina el avatar del usuario"""
     try:
         # Obtener URL del avatar actual
-        user_response = supabase.table("users").select("avatar_url").eq("id", user_id).single().execute()
+        user_response = await run_query(supabase.table("users").select("avatar_url").eq("id", user_id).single())
         
         if not user_response.data:
             raise HTTPException(
@@ -257,22 +465,20 @@ async def delete_avatar(
                 detail="El usuario no tiene avatar para eliminar"
             )
         
-        # Eliminar del storage
-        await delete_old_avatar(supabase, user_id, avatar_url)
-        
         # Actualizar base de datos
-        supabase.table("users").update({
-            "avatar_url": None
-        }).eq("id", user_id).execute()
+        await run_query(
+            supabase.table("users").update({
+                "avatar_url": None
+            }).eq("id", user_id)
+        )
+        await invalidate_row("users", user_id)
+        
+        # Eliminar del storage después de responder
+        background.add_task(delete_old_avatar, supabase, user_id, avatar_url)
         
         return MessageResponse(
             message="Avatar eliminado exitosamente"
         )
         
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al eliminar avatar: {str(e)}"
-        )
\ No newline at end of file
+    except APIError as e:
+        raise api_error_to_http(e, "Usuario no encontrado", "Error al eliminar avatar")
\ No newline at end of file
@@ -1,86 +1,144 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from supabase import Client
-from app.database import get_service_supabase
+from app.database import get_service_supabase, run_query
 from app.schemas.reminders import (
     ReminderCreate,
     ReminderUpdate,
     ReminderResponse,
-    NotificationResponse
+    NotificationResponse,
+    UnreadCountResponse
 )
 from app.dependencies.auth import get_current_user_id
-from typing import List
-from datetime import datetime
+from app.cache import is_owner_cached, remember_owner
+from app.utils.errors import PG_FK_VIOLATION, api_error_to_http, logger
+from app.utils.http_cache import build_etag, cache_headers, not_modified_response, fetch_change_marker
+from postgrest.exceptions import APIError
+from typing import List, Optional
+import asyncio
+import orjson
+from datetime import datetime, date
 
 
 router = APIRouter()
 
 
+# Columnas que usa NotificationResponse (evita traer columnas que no se devuelven)
+NOTIFICATION_COLUMNS = "id, user_id, task_id, reminder_id, title, message, notification_type, is_read, created_at"
+
+# Recordatorio + tarea embebida por FK (PostgREST resuelve el join en una sola consulta)
+REMINDER_WITH_TASK_COLUMNS = "*, tasks!reminders_task_id_fkey(title, due_date)"
+
+
 # =====================================================
 # HELPER FUNCTIONS
 # =====================================================
 
-def calculate_days_until_due(due_date_str: str) -> int:
-    """Calcula días hasta vencimiento"""
-    if not due_date_str:
+def calculate_days_until_due(due_date_str: Optional[str], today: Optional[date] = None) -> Optional[int]:
+    """
+    Calcula días hasta vencimiento.
+    En listas pasar `today` calculado una sola vez fuera del loop.
+    Python 3.11+ ya acepta el sufijo 'Z' en fromisoformat.
+    """
+    if due_date_str is None:
         return None
+    if today is None:
+        today = date.today()
     try:
-        due_date = datetime.fromisoformat(due_date_str.replace('Z', '+00:00'))
-        today = datetime.now()
-        delta = due_date.date() - today.date()
-        return delta.days
-    except:
+        return (datetime.fromisoformat(due_date_str).date() - today).days
+    except ValueError:
         return None
 
 
+def apply_task_fields(reminder: dict, task: Optional[dict], today: Optional[date] = None) -> dict:
+    """Copia título y vencimiento de la tarea al recordatorio (solo diccionarios, sin red)"""
+    if task:
+        reminder["task_title"] = task.get("title")
+        reminder["task_due_date"] = task.get("due_date")
+        if task.get("due_date"):
+            reminder["days_until_due"] = calculate_days_until_due(task["due_date"], today)
+    return reminder
+
+
+def map_embedded_task(reminder: dict, today: Optional[date] = None) -> dict:
+    """Aplana la tarea embebida por REMINDER_WITH_TASK_COLUMNS en el recordatorio"""
+    return apply_task_fields(reminder, reminder.pop("tasks", None), today)
+
+
 async def enrich_reminder_data(reminder: dict, supabase: Client) -> dict:
-    """Enriquece recordatorio con datos de tarea"""
+    """
+    Enriquece recordatorio con datos de tarea.
+    Solo para insert/update, donde no se puede embeber la tarea en la respuesta.
+    """
     try:
-        task = supabase.table("tasks").select("title, due_date").eq("id", reminder["task_id"]).single().execute()
-        
-        if task.data:
-            reminder["task_title"] = task.data.get("title")
-            reminder["task_due_date"] = task.data.get("due_date")
-            
-            if task.data.get("due_date"):
-                reminder["days_until_due"] = calculate_days_until_due(task.data["due_date"])
-        
-        return reminder
+        task = await run_query(supabase.table("tasks").select("title, due_date").eq("id", reminder["task_id"]).single())
+        return apply_task_fields(reminder, task.data)
     except Exception as e:
-        print(f"Error enriqueciendo: {e}")
+        logger.warning("Error enriqueciendo recordatorio: %s", e)
         return reminder
 
 
+async def count_unread_notifications(supabase: Client, user_id: str) -> int:
+    """Cuenta notificaciones no leídas sin traer las filas"""
+    # El total viene en el header Content-Range; limit(1) evita transferir filas
+    response = await run_query(
+        supabase.table("notifications")
+        .select("id", count="exact")
+        .eq("user_id", user_id)
+        .eq("is_read", False)
+        .limit(1)
+    )
+    return response.count or 0
+
+
 # =====================================================
 # ENDPOINTS - RECORDATORIOS
 # =====================================================
 
-@router.get("/", response_model=List[ReminderResponse])
+@router.get(
+    "/",
+    response_model=None,
+    response_class=ORJSONResponse,
+    responses={200: {"model": List[ReminderResponse]}}
+)
 async def get_reminders(
+    request: Request,
     user_id: str = Depends(get_current_user_id),
     supabase: Client = Depends(get_service_supabase)
 ):
-    """Obtiene todos los recordatorios del usuario"""
+    """
+    Obtiene todos los recordatorios del usuario.
+    Responde 304 si no cambiaron ni los recordatorios ni sus tareas.
+    """
     try:
-        response = supabase.table("reminders")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .order("created_at", desc=True)\
-            .execute()
-        
-        enriched = []
-        for reminder in response.data:
-            enriched_reminder = await enrich_reminder_data(reminder, supabase)
-            enriched.append(enriched_reminder)
+        today = date.today()
         
-        return enriched
+        # days_until_due depende del día, por eso entra en el ETag
+        reminders_marker, tasks_marker = await asyncio.gather(
+            fetch_change_marker(supabase, "reminders", user_id),
+            fetch_change_marker(supabase, "tasks", user_id)
+        )
+        etag = build_etag(user_id, today, *reminders_marker, *tasks_marker)
+        not_modified = not_modified_response(request, etag)
+        if not_modified:
+            return not_modified
+        
+        response = await run_query(
+            supabase.table("reminders")
+            .select(REMINDER_WITH_TASK_COLUMNS)
+            .eq("user_id", user_id)
+            .order("created_at", desc=True)
+        )
         
-    except Exception as e:
-        #print(f"Error: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
+        # Filas confiables de Supabase: se serializan sin re-validar con Pydantic
+        return ORJSONResponse(
+            [map_embedded_task(r, today) for r in response.data],
+            headers=cache_headers(etag)
         )
+        
+    except APIError as e:
+        raise api_error_to_http(e, "Recordatorio no encontrado", "Error al obtener recordatorios")
 
 
 @router.post("/", response_model=ReminderResponse, status_code=status.HTTP_201_CREATED)
@@ -91,33 +149,22 @@ async def create_reminder(
 ):
     """Crea un nuevo recordatorio"""
     try:
-        # Verificar tarea
-        task_check = supabase.table("tasks")\
-            .select("id")\
-            .eq("id", reminder_data.task_id)\
-            .eq("user_id", user_id)\
-            .execute()
-        
-        if not task_check.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Tarea no encontrada"
-            )
-        
-        # Validar tipo
-        valid_types = ["daily", "before_due", "on_due"]
-        if reminder_data.reminder_type not in valid_types:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Tipo inválido. Usar: {', '.join(valid_types)}"
-            )
-        
-        # Validar days_before
-        if reminder_data.reminder_type == "before_due" and not reminder_data.days_before:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="days_before requerido para 'before_due'"
+        # Verificar tarea (se omite si se verificó hace poco)
+        if not await is_owner_cached("task", user_id, reminder_data.task_id):
+            task_check = await run_query(
+                supabase.table("tasks")
+                .select("id")
+                .eq("id", reminder_data.task_id)
+                .eq("user_id", user_id)
             )
+            
+            if not task_check.data:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Tarea no encontrada"
+                )
+            
+            await remember_owner("task", user_id, reminder_data.task_id)
         
         # Crear
         new_reminder = {
@@ -129,7 +176,7 @@ async def create_reminder(
             "is_active": reminder_data.is_active
         }
         
-        response = supabase.table("reminders").insert(new_reminder).execute()
+        response = await run_query(supabase.table("reminders").insert(new_reminder))
         
         if not response.data:
             raise HTTPException(
@@ -138,17 +185,16 @@ async def create_reminder(
             )
         
         enriched = await enrich_reminder_data(response.data[0], supabase)
-        #print(f"Recordatorio creado: {enriched['id']}")
         return enriched
         
-    except HTTPException:
-        raise
-    except Exception as e:
-        #print(f"Error: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
+    except APIError as e:
+        # La tarea se borró después de verificar la pertenencia
+        if e.code == PG_FK_VIOLATION:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Tarea no encontrada"
+            )
+        raise api_error_to_http(e, "Tarea no encontrada", "Error al crear recordatorio")
 
 
 @router.get("/{reminder_id}", response_model=ReminderResponse)
@@ -159,12 +205,13 @@ async def get_reminder(
 ):
     """Obtiene un recordatorio"""
     try:
-        response = supabase.table("reminders")\
-            .select("*")\
-            .eq("id", reminder_id)\
-            .eq("user_id", user_id)\
-            .single()\
-            .execute()
+        response = await run_query(
+            supabase.table("reminders")
+            .select(REMINDER_WITH_TASK_COLUMNS)
+            .eq("id", reminder_id)
+            .eq("user_id", user_id)
+            .single()
+        )
         
         if not response.data:
             raise HTTPException(
@@ -172,16 +219,10 @@ async def get_reminder(
                 detail="Recordatorio no encontrado"
             )
         
-        enriched = await enrich_reminder_data(response.data, supabase)
-        return enriched
+        return map_embedded_task(response.data)
         
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
+    except APIError as e:
+        raise api_error_to_http(e, "Recordatorio no encontrado", "Error al obtener recordatorio")
 
 
 @router.put("/{reminder_id}", response_model=ReminderResponse)
@@ -193,18 +234,6 @@ async def update_reminder(
 ):
     """Actualiza un recordatorio"""
     try:
-        check = supabase.table("reminders")\
-            .select("id")\
-            .eq("id", reminder_id)\
-            .eq("user_id", user_id)\
-            .execute()
-        
-        if not check.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Recordatorio no encontrado"
-            )
-        
         update_data = {}
         if reminder_data.reminder_type is not None:
             update_data["reminder_type"] = reminder_data.reminder_type
@@ -221,22 +250,25 @@ async def update_reminder(
                 detail="Proporciona al menos un campo"
             )
         
-        response = supabase.table("reminders")\
-            .update(update_data)\
-            .eq("id", reminder_id)\
-            .execute()
+        # Solo afecta la fila si pertenece al usuario
+        response = await run_query(
+            supabase.table("reminders")
+            .update(update_data)
+            .eq("id", reminder_id)
+            .eq("user_id", user_id)
+        )
+        
+        if not response.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Recordatorio no encontrado"
+            )
         
         enriched = await enrich_reminder_data(response.data[0], supabase)
-        #print(f"Actualizado: {reminder_id}")
         return enriched
         
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
+    except APIError as e:
+        raise api_error_to_http(e, "Recordatorio no encontrado", "Error al actualizar recordatorio")
 
 
 @router.delete("/{reminder_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -247,79 +279,133 @@ async def delete_reminder(
 ):
     """Elimina un recordatorio"""
     try:
-        check = supabase.table("reminders")\
-            .select("id")\
-            .eq("id", reminder_id)\
-            .eq("user_id", user_id)\
-            .execute()
+        response = await run_query(
+            supabase.table("reminders")
+            .delete()
+            .eq("id", reminder_id)
+            .eq("user_id", user_id)
+        )
         
-        if not check.data:
+        if not response.data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Recordatorio no encontrado"
             )
         
-        supabase.table("reminders").delete().eq("id", reminder_id).execute()
-        #print(f"Eliminado: {reminder_id}")
         return None
         
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
+    except APIError as e:
+        raise api_error_to_http(e, "Recordatorio no encontrado", "Error al eliminar recordatorio")
 
 
 # =====================================================
 # ENDPOINTS - NOTIFICACIONES
 # =====================================================
 
-@router.get("/notifications/all", response_model=List[NotificationResponse])
+@router.get(
+    "/notifications/all",
+    response_model=None,
+    response_class=ORJSONResponse,
+    responses={200: {"model": List[NotificationResponse]}}
+)
 async def get_notifications(
+    request: Request,
     user_id: str = Depends(get_current_user_id),
     supabase: Client = Depends(get_service_supabase)
 ):
-    """Obtiene todas las notificaciones"""
+    """
+    Obtiene todas las notificaciones.
+    Responde 304 si no hubo notificaciones nuevas ni cambios en las leídas.
+    """
     try:
-        response = supabase.table("notifications")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .order("created_at", desc=True)\
-            .limit(50)\
-            .execute()
+        # Las notificaciones no se editan: basta con la última creada y el total de no leídas
+        notifications_marker, unread = await asyncio.gather(
+            fetch_change_marker(supabase, "notifications", user_id, column="created_at"),
+            count_unread_notifications(supabase, user_id)
+        )
+        etag = build_etag(user_id, *notifications_marker, unread)
+        not_modified = not_modified_response(request, etag)
+        if not_modified:
+            return not_modified
+        
+        response = await run_query(
+            supabase.table("notifications")
+            .select(NOTIFICATION_COLUMNS)
+            .eq("user_id", user_id)
+            .order("created_at", desc=True)
+            .limit(50)
+        )
         
-        return response.data
+        return ORJSONResponse(response.data, headers=cache_headers(etag))
         
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
+    except APIError as e:
+        raise api_error_to_http(e, "Notificación no encontrada", "Error al obtener notificaciones")
+
+
+@router.get("/notifications/all/stream", response_class=StreamingResponse)
+async def stream_notifications(
+    user_id: str = Depends(get_current_user_id),
+    supabase: Client = Depends(get_service_supabase)
+):
+    """
+    Igual que /notifications/all pero en NDJSON (una notificación por línea),
+    para que el cliente empiece a renderizar antes de recibir todo el cuerpo.
+    """
+    try:
+        response = await run_query(
+            supabase.table("notifications")
+            .select(NOTIFICATION_COLUMNS)
+            .eq("user_id", user_id)
+            .order("created_at", desc=True)
+            .limit(50)
         )
+    except APIError as e:
+        raise api_error_to_http(e, "Notificación no encontrada", "Error al obtener notificaciones")
+    
+    def generate():
+        for row in response.data:
+            yield orjson.dumps(row) + b"\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
 
 
-@router.get("/notifications/unread", response_model=List[NotificationResponse])
+@router.get(
+    "/notifications/unread",
+    response_model=None,
+    response_class=ORJSONResponse,
+    responses={200: {"model": List[NotificationResponse]}}
+)
 async def get_unread_notifications(
     user_id: str = Depends(get_current_user_id),
     supabase: Client = Depends(get_service_supabase)
 ):
     """Obtiene notificaciones no leídas"""
     try:
-        response = supabase.table("notifications")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .eq("is_read", False)\
-            .order("created_at", desc=True)\
-            .execute()
+        response = await run_query(
+            supabase.table("notifications")
+            .select(NOTIFICATION_COLUMNS)
+            .eq("user_id", user_id)
+            .eq("is_read", False)
+            .order("created_at", desc=True)
+        )
         
-        return response.data
+        return ORJSONResponse(response.data)
         
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
+    except APIError as e:
+        raise api_error_to_http(e, "Notificación no encontrada", "Error al obtener notificaciones")
+
+
+@router.get("/notifications/unread/count", response_model=UnreadCountResponse)
+async def get_unread_notifications_count(
+    user_id: str = Depends(get_current_user_id),
+    supabase: Client = Depends(get_service_supabase)
+):
+    """Cuenta notificaciones no leídas (para el badge) sin traer las filas"""
+    try:
+        return {"count": await count_unread_notifications(supabase, user_id)}
+        
+    except APIError as e:
+        raise api_error_to_http(e, "Notificación no encontrada", "Error al contar notificaciones")
 
 
 @router.patch("/notifications/{notification_id}/read", response_model=NotificationResponse)
@@ -330,11 +416,12 @@ async def mark_notification_as_read(
 ):
     """Marca como leída"""
     try:
-        response = supabase.table("notifications")\
-            .update({"is_read": True})\
-            .eq("id", notification_id)\
-            .eq("user_id", user_id)\
-            .execute()
+        response = await run_query(
+            supabase.table("notifications")
+            .update({"is_read": True})
+            .eq("id", notification_id)
+            .eq("user_id", user_id)
+        )
         
         if not response.data:
             raise HTTPException(
@@ -344,13 +431,8 @@ async def mark_notification_as_read(
         
         return response.data[0]
         
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
+    except APIError as e:
+        raise api_error_to_http(e, "Notificación no encontrada", "Error al marcar notificación")
 
 
 @router.post("/notifications/mark-all-read")
@@ -360,16 +442,14 @@ async def mark_all_notifications_as_read(
 ):
     """Marca todas como leídas"""
     try:
-        supabase.table("notifications")\
-            .update({"is_read": True})\
-            .eq("user_id", user_id)\
-            .eq("is_read", False)\
-            .execute()
+        await run_query(
+            supabase.table("notifications")
+            .update({"is_read": True})
+            .eq("user_id", user_id)
+            .eq("is_read", False)
+        )
         
         return {"message": "Todas marcadas como leídas"}
         
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
\ No newline at end of file
+    except APIError as e:
+        raise api_error_to_http(e, "Notificación no encontrada", "Error al marcar notificaciones")
\ No newline at end of file
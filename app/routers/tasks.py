@@ -1,67 +1,353 @@
-from fastapi import APIRouter, Depends, HTTPException, status as http_status, Query
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status as http_status, Query
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
 from supabase import Client
-from app.database import get_service_supabase
-from app.schemas.tasks import (
+from app.database import get_service_supabase, get_pg_pool, record_to_dict, run_query
+from app.schemas.tasks_in import (
+    TaskBatchItem,
     TaskCreate,
     TaskMoveRequest,
     TaskUpdate,
-    TaskStatusUpdate,
-    TaskResponse,
-    TaskListResponse,
-    AssigneeResponse
+    TaskStatusUpdate
 )
+from app.schemas.tasks_out import TaskResponse, TaskListResponse
 from app.dependencies.auth import get_current_user_id
-from typing import List, Optional
+from app.utils.errors import PG_FK_VIOLATION, api_error_to_http, logger
+from app.cache import (
+    TASK_LIST_TTL,
+    cache_get,
+    cache_rows,
+    cache_set,
+    forget_owner,
+    get_cached_rows,
+    invalidate_task_lists,
+    task_list_cache_key
+)
+from postgrest.exceptions import APIError
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timezone
 from pydantic import ValidationError
+from functools import lru_cache
+import asyncio
+import asyncpg
+import orjson
 
 
 router = APIRouter()
 
 
+# Máximo de tareas por POST /batch-update
+MAX_BATCH_SIZE = 100
+
+# Columnas de tasks que serializa TaskResponse. Los listados no traen
+# columnas que la API nunca devuelve
+TASK_COLUMN_NAMES = (
+    "id", "user_id", "board_id", "title", "description", "priority", "status",
+    "status_badge", "status_badge_color", "assignee_id", "due_date", "due_time",
+    "completed", "created_at", "updated_at"
+)
+TASK_COLUMNS = ",".join(TASK_COLUMN_NAMES)
+
+# Campos de TaskCreate que configuran el recordatorio y no son columnas de tasks
+REMINDER_FIELDS = {"create_reminder", "reminder_days_before", "reminder_time"}
+
+
 # =====================================================
 # HELPER FUNCTIONS
 # =====================================================
 
+async def fetch_enrichment_maps(tasks: List[dict], supabase: Client) -> Tuple[Dict, Dict]:
+    """
+    Trae en bloque los boards y usuarios asignados de una lista de tareas.
+    Primero se busca en Redis; solo los ids que faltan van a una
+    consulta IN por tabla, lanzadas en paralelo.
+    Retorna board_id -> fila del board y assignee_id -> dict "assignee"
+    ya armado, que se comparte entre todas las tareas de ese usuario.
+    """
+    board_ids = {t["board_id"] for t in tasks if t.get("board_id")}
+    assignee_ids = {t["assignee_id"] for t in tasks if t.get("assignee_id")}
+    
+    async def fetch_map(table: str, columns: str, ids: set) -> Dict:
+        if not ids:
+            return {}
+        rows = await get_cached_rows(table, list(ids))
+        missing = [object_id for object_id in ids if object_id not in rows]
+        if not missing:
+            return rows
+        try:
+            response = await run_query(supabase.table(table).select(columns).in_("id", missing))
+        except Exception:
+            return rows
+        await cache_rows(table, response.data)
+        rows.update((row["id"], row) for row in response.data)
+        return rows
+    
+    boards_map, users_map = await asyncio.gather(
+        fetch_map("boards", "id, name", board_ids),
+        fetch_map("users", "id, full_name, avatar_url", assignee_ids)
+    )
+    
+    assignees_map = {
+        user_id: {
+            "id": user["id"],
+            "name": user["full_name"] or "Usuario",
+            "avatar": user["avatar_url"]
+        }
+        for user_id, user in users_map.items()
+    }
+    
+    return boards_map, assignees_map
+
+
+def enrich_task_data_sync(task: dict, boards_map: Dict, assignees_map: Dict) -> dict:
+    """Agrega board y assignee a la tarea usando los mapas ya cargados (sin red)."""
+    board = boards_map.get(task.get("board_id"))
+    task["board"] = board["name"] if board else None
+    task["assignee"] = assignees_map.get(task.get("assignee_id"))
+    return task
+
+
+async def enrich_tasks(tasks: List[dict], supabase: Client) -> List[dict]:
+    """Enriquece una lista de tareas con una consulta por tabla relacionada."""
+    boards_map, assignees_map = await fetch_enrichment_maps(tasks, supabase)
+    return [enrich_task_data_sync(task, boards_map, assignees_map) for task in tasks]
+
+
 async def enrich_task_data(task: dict, supabase: Client) -> dict:
     """Enriquece los datos de una tarea con información adicional."""
-    try:
-        # Agregar nombre del board
-        if task.get("board_id"):
-            try:
-                board = supabase.table("boards").select("name").eq("id", task["board_id"]).single().execute()
-                task["board"] = board.data["name"] if board.data else None
-            except Exception:
-                task["board"] = None
-        else:
-            task["board"] = None
-        
-        # Agregar datos del asignado
-        if task.get("assignee_id"):
-            try:
-                assignee = supabase.table("users").select("id, full_name, avatar_url").eq("id", task["assignee_id"]).single().execute()
-                if assignee.data:
-                    task["assignee"] = {
-                        "id": assignee.data["id"],
-                        "name": assignee.data["full_name"] or "Usuario",
-                        "avatar": assignee.data["avatar_url"]
-                    }
-                else:
-                    task["assignee"] = None
-            except Exception:
-                task["assignee"] = None
+    return (await enrich_tasks([task], supabase))[0]
+
+
+def trim_page(rows: List, page_size: int) -> bool:
+    """
+    Las consultas piden page_size + 1 filas: si llegó la fila extra hay
+    página siguiente. La quita de la lista y retorna has_next.
+    """
+    if len(rows) > page_size:
+        rows.pop()
+        return True
+    return False
+
+
+def next_cursor(tasks: List[dict], has_next: bool) -> Optional[dict]:
+    """Cursor de la siguiente página, o None si esta fue la última."""
+    if not has_next:
+        return None
+    last = tasks[-1]
+    return {"created_at": last["created_at"], "id": last["id"]}
+
+
+def share_assignees(tasks: List[dict]) -> List[dict]:
+    """
+    Saca los asignados de las tareas a una lista única: cada tarea cambia
+    "assignee" por "assignee_idx" (posición en la lista, o None).
+    Con pocos usuarios repartidos en la página, cada nombre y avatar
+    viaja una sola vez.
+    """
+    assignees = []
+    index_by_id = {}
+    for task in tasks:
+        assignee = task.pop("assignee", None)
+        if assignee is None:
+            task["assignee_idx"] = None
+            continue
+        idx = index_by_id.get(assignee["id"])
+        if idx is None:
+            idx = index_by_id[assignee["id"]] = len(assignees)
+            assignees.append(assignee)
+        task["assignee_idx"] = idx
+    return assignees
+
+
+# =====================================================
+# CONSULTAS DIRECTAS A POSTGRES (asyncpg)
+# =====================================================
+
+# Tarea + nombre del board + datos del asignado en una sola consulta
+ENRICHED_TASK_SELECT = """
+    SELECT
+        {columns},
+        b.name AS board_name,
+        u.id IS NOT NULL AS has_assignee,
+        u.full_name AS assignee_name,
+        u.avatar_url AS assignee_avatar
+    FROM tasks t
+    LEFT JOIN boards b ON b.id = t.board_id
+    LEFT JOIN users u ON u.id = t.assignee_id
+""".format(columns=", ".join(f"t.{column}" for column in TASK_COLUMN_NAMES))
+
+
+def enriched_record_to_task(record: asyncpg.Record) -> dict:
+    """Convierte una fila de ENRICHED_TASK_SELECT al formato de TaskResponse."""
+    task = record_to_dict(record)
+    task.pop("total", None)
+    task["board"] = task.pop("board_name")
+    
+    has_assignee = task.pop("has_assignee")
+    assignee_name = task.pop("assignee_name")
+    assignee_avatar = task.pop("assignee_avatar")
+    task["assignee"] = {
+        "id": task["assignee_id"],
+        "name": assignee_name or "Usuario",
+        "avatar": assignee_avatar
+    } if has_assignee else None
+    
+    return task
+
+
+@lru_cache(maxsize=64)
+def list_tasks_sql(filter_columns: Tuple[str, ...], with_cursor: bool) -> Tuple[str, str]:
+    """
+    SQL de la página de tareas y de su conteo para una combinación de filtros.
+    Cada combinación produce siempre el mismo texto, así el caché de
+    statements de asyncpg (DB_STATEMENT_CACHE_SIZE) reutiliza el plan en
+    lugar de parsear y planificar en cada request. Se prefieren pocas
+    variantes fijas a un único SQL con "$n IS NULL OR ...": ese patrón
+    obliga a un plan genérico que no aprovecha los índices.
+    """
+    conditions = ["t.user_id = $1"]
+    params = 1
+    for column in filter_columns:
+        params += 1
+        conditions.append(f"t.{column} = ${params}")
+    if with_cursor:
+        params += 2
+        conditions.append(f"(t.created_at, t.id) < (${params - 1}, ${params})")
+    where = " AND ".join(conditions)
+    
+    list_sql = (
+        f"SELECT e.*, count(*) OVER() AS total FROM ({ENRICHED_TASK_SELECT} WHERE {where}) e "
+        f"ORDER BY e.created_at DESC, e.id DESC LIMIT ${params + 1} OFFSET ${params + 2}"
+    )
+    count_sql = f"SELECT count(*) FROM tasks t WHERE {where}"
+    return list_sql, count_sql
+
+
+async def pg_fetch_tasks(
+    pool: asyncpg.Pool,
+    user_id: str,
+    filters: Dict,
+    limit: int,
+    offset: int,
+    cursor: Optional[Tuple[datetime, int]] = None
+) -> Tuple[List[dict], int]:
+    """
+    Página de tareas enriquecidas del usuario y total para los filtros dados.
+    Solo se agregan al WHERE los filtros presentes; el total sale de
+    count(*) OVER() en la misma consulta.
+    Con cursor (created_at, id) la página empieza justo después de esa tarea
+    y el offset se ignora.
+    """
+    active = {column: value for column, value in filters.items() if value is not None}
+    list_sql, count_sql = list_tasks_sql(tuple(active), cursor is not None)
+    
+    args = [user_id, *active.values()]
+    if cursor is not None:
+        args.extend(cursor)
+        offset = 0
+    
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(list_sql, *args, limit, offset)
+        
+        if rows:
+            total = rows[0]["total"]
+        elif offset:
+            # Página fuera de rango: el window no tiene filas de donde leer el total
+            total = await conn.fetchval(count_sql, *args)
         else:
-            task["assignee"] = None
+            total = 0
+    
+    return [enriched_record_to_task(row) for row in rows], total
+
+
+async def pg_fetch_task(pool: asyncpg.Pool, user_id: str, task_id: int) -> Optional[dict]:
+    """Una tarea enriquecida del usuario o None"""
+    row = await pool.fetchrow(
+        f"{ENRICHED_TASK_SELECT} WHERE t.id = $1 AND t.user_id = $2",
+        task_id, user_id
+    )
+    return enriched_record_to_task(row) if row else None
+
+
+async def pg_fetch_board_tasks(pool: asyncpg.Pool, user_id: str, board_id: int) -> Optional[List[dict]]:
+    """
+    Tareas enriquecidas de un board del usuario. None si el board no existe
+    o es ajeno. Solo consulta el board aparte cuando no hay tareas.
+    """
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            f"{ENRICHED_TASK_SELECT} WHERE t.board_id = $1 AND b.user_id = $2 ORDER BY t.created_at",
+            board_id, user_id
+        )
         
-        return task
-    except Exception as e:
-        return task
+        if not rows:
+            board_exists = await conn.fetchval(
+                "SELECT EXISTS (SELECT 1 FROM boards WHERE id = $1 AND user_id = $2)",
+                board_id, user_id
+            )
+            if not board_exists:
+                return None
+    
+    return [enriched_record_to_task(row) for row in rows]
 
 
 # =====================================================
 # ENDPOINTS
 # =====================================================
-@router.get("/", response_model=TaskListResponse)
+async def postgrest_fetch_tasks(
+    supabase: Client,
+    user_id: str,
+    board_id: Optional[int],
+    status: Optional[str],
+    priority: Optional[str],
+    completed: Optional[bool],
+    page_size: int,
+    offset: int,
+    cursor: Optional[Tuple[datetime, int]]
+) -> Tuple[List[dict], int, bool]:
+    """
+    Página de tareas vía PostgREST (sin DATABASE_URL), enriquecida.
+    Retorna (tareas, total, has_next).
+    """
+    # count="estimated": PostgREST cuenta exacto hasta max-rows y por encima
+    # usa la estimación del planner, sin recorrer todas las filas filtradas
+    query = supabase.table("tasks").select(TASK_COLUMNS, count="estimated").eq("user_id", user_id)
+    
+    # Aplicar filtros
+    if board_id is not None:
+        query = query.eq("board_id", board_id)
+    if status is not None:
+        query = query.eq("status", status)
+    if priority is not None:
+        query = query.eq("priority", priority)
+    if completed is not None:
+        query = query.eq("completed", completed)
+    
+    # Aplicar orden y paginación (keyset si hay cursor, offset si no)
+    query = query.order("created_at", desc=True).order("id", desc=True)
+    if cursor is not None:
+        created_at = cursor[0].isoformat()
+        query = query.or_(
+            f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{cursor[1]})'
+        ).limit(page_size + 1)
+    else:
+        query = query.range(offset, offset + page_size)
+    
+    response = await run_query(query)
+    has_next = trim_page(response.data, page_size)
+    
+    # Enriquecer datos
+    enriched_tasks = await enrich_tasks(response.data, supabase)
+    
+    return enriched_tasks, response.count if response.count else 0, has_next
+
+
+@router.get(
+    "/",
+    response_model=None,
+    response_class=ORJSONResponse,
+    responses={200: {"model": TaskListResponse}}
+)
 async def get_tasks(
     board_id: Optional[int] = Query(None),
     status: Optional[str] = Query(None),
@@ -69,173 +355,234 @@ async def get_tasks(
     completed: Optional[bool] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=100),
+    cursor_created_at: Optional[datetime] = Query(None),
+    cursor_id: Optional[int] = Query(None),
+    shared_assignees: bool = Query(False),
     user_id: str = Depends(get_current_user_id),
-    supabase: Client = Depends(get_service_supabase)  
+    supabase: Client = Depends(get_service_supabase),
+    pool: Optional[asyncpg.Pool] = Depends(get_pg_pool)
 ):
-    """Obtiene todas las tareas del usuario con filtros opcionales."""
+    """
+    Obtiene todas las tareas del usuario con filtros opcionales.
+    
+    Paginación por cursor: enviar cursor_created_at y cursor_id con el
+    next_cursor de la respuesta anterior. En ese caso page se ignora y
+    total cuenta las tareas que quedan desde el cursor.
+    
+    Con shared_assignees=true los asignados se envían una sola vez en
+    "assignees" y cada tarea los referencia con "assignee_idx".
+    """
+    if (cursor_created_at is None) != (cursor_id is None):
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail="cursor_created_at y cursor_id deben enviarse juntos"
+        )
+    if cursor_created_at is not None and cursor_created_at.tzinfo is None:
+        cursor_created_at = cursor_created_at.replace(tzinfo=timezone.utc)
+    cursor = (cursor_created_at, cursor_id) if cursor_id is not None else None
+    
+    # Página ya serializada en Redis: se devuelven los bytes tal cual
+    cache_key = await task_list_cache_key(
+        user_id, board_id, status, priority, completed, page, page_size,
+        cursor_created_at.isoformat() if cursor else None, cursor_id,
+        shared_assignees
+    )
+    if cache_key is not None:
+        cached = await cache_get(cache_key)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+    
     try:
-        query = supabase.table("tasks").select("*", count="exact").eq("user_id", user_id)
-        
-        # Aplicar filtros
-        if board_id is not None:
-            query = query.eq("board_id", board_id)
-        if status is not None:
-            query = query.eq("status", status)
-        if priority is not None:
-            query = query.eq("priority", priority)
-        if completed is not None:
-            query = query.eq("completed", completed)
-        
-        # Aplicar orden y paginación
         offset = (page - 1) * page_size
-        query = query.order("created_at", desc=True).range(offset, offset + page_size - 1)
         
-        response = query.execute()
+        if pool is not None:
+            tasks, total = await pg_fetch_tasks(
+                pool,
+                user_id,
+                {"board_id": board_id, "status": status, "priority": priority, "completed": completed},
+                page_size + 1,
+                offset,
+                cursor
+            )
+            has_next = trim_page(tasks, page_size)
+        else:
+            tasks, total, has_next = await postgrest_fetch_tasks(
+                supabase, user_id, board_id, status, priority, completed,
+                page_size, offset, cursor
+            )
         
-        # Enriquecer datos
-        enriched_tasks = []
-        for task in response.data:
-            try:
-                enriched_task = await enrich_task_data(task, supabase)
-                enriched_tasks.append(enriched_task)
-            except Exception:
-                enriched_tasks.append(task)
-        
-        return TaskListResponse(
-            tasks=enriched_tasks,
-            total=response.count if response.count else 0,
-            page=page,
-            page_size=page_size
-        )
+        payload = {
+            "tasks": tasks,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "has_next": has_next,
+            "next_cursor": next_cursor(tasks, has_next)
+        }
+        if shared_assignees:
+            payload["assignees"] = share_assignees(tasks)
+        
+        # Filas confiables de la base: se serializan sin re-validar con Pydantic
+        body = orjson.dumps(payload)
+        
+        if cache_key is not None:
+            await cache_set(cache_key, body, TASK_LIST_TTL)
+        
+        return Response(content=body, media_type="application/json")
         
-    except Exception as e:
-        #print(f"Error al obtener tareas: {str(e)}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Error al obtener tareas")
         raise HTTPException(
             status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al obtener tareas: {str(e)}"
+            detail="Error al obtener tareas"
         )
 
 
-@router.post("/", response_model=TaskResponse, status_code=http_status.HTTP_201_CREATED)
+async def task_create_body(request: Request) -> TaskCreate:
+    """
+    Valida el body de POST /tasks directo desde los bytes: pydantic-core
+    parsea y valida el JSON en un solo paso, sin json.loads ni dict intermedio.
+    """
+    try:
+        return TaskCreate.model_validate_json(await request.body())
+    except ValidationError as e:
+        # Mismo formato que el 422 que FastAPI genera para un body inválido
+        raise RequestValidationError([
+            {**error, "loc": ("body", *error["loc"])}
+            for error in e.errors(include_url=False)
+        ])
+
+
+@router.post(
+    "/",
+    response_model=None,
+    response_class=ORJSONResponse,
+    status_code=http_status.HTTP_201_CREATED,
+    responses={201: {"model": TaskResponse}},
+    # El body llega por dependencia: se declara a mano para el OpenAPI
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": TaskCreate.model_json_schema()}}
+        }
+    }
+)
 async def create_task(
-    task_data: TaskCreate,
+    # Auth primero: sin token se rechaza antes de leer y validar el body
     user_id: str = Depends(get_current_user_id),
+    task_data: TaskCreate = Depends(task_create_body),
     supabase: Client = Depends(get_service_supabase)
 ):
     """Crea una nueva tarea con recordatorio opcional."""
     try:
-        # Verificar board si existe
-        if task_data.board_id:
-            board_check = supabase.table("boards")\
-                .select("id")\
-                .eq("id", task_data.board_id)\
-                .eq("user_id", user_id)\
-                .execute()
-            
-            if not board_check.data:
-                raise HTTPException(
-                    status_code=http_status.HTTP_404_NOT_FOUND,
-                    detail="Tablero no encontrado"
-                )
-        
-        # Crear tarea
+        # Crear tarea (los campos del recordatorio van aparte a la RPC)
         new_task = {
+            **task_data.model_dump(mode="json", exclude=REMINDER_FIELDS),
             "user_id": user_id,
-            "title": task_data.title,
-            "description": task_data.description,
-            "board_id": task_data.board_id,
-            "priority": task_data.priority,
-            "status": task_data.status,
-            "status_badge": task_data.status_badge,
-            "status_badge_color": task_data.status_badge_color,
-            "assignee_id": task_data.assignee_id,
-            "due_date": task_data.due_date,
-            "due_time": task_data.due_time, 
             "completed": False
         }
         
-        response = supabase.table("tasks").insert(new_task).execute()
+        # board y assignee ya se conocen: sus datos se buscan mientras
+        # se inserta la tarea, no después
+        enrichment = asyncio.create_task(fetch_enrichment_maps([new_task], supabase))
+        
+        # Tarea + recordatorio automático en una sola transacción (RPC).
+        # La FK (board_id, user_id) -> boards valida el board en el mismo INSERT
+        try:
+            response = await run_query(
+                supabase.rpc("create_task_with_reminder", {
+                    "p_task": new_task,
+                    "p_create_reminder": task_data.create_reminder,
+                    "p_days_before": task_data.reminder_days_before,
+                    "p_reminder_time": task_data.reminder_time
+                })
+            )
+        except BaseException as e:
+            enrichment.cancel()
+            if isinstance(e, APIError) and e.code == PG_FK_VIOLATION:
+                raise HTTPException(
+                    status_code=http_status.HTTP_404_NOT_FOUND,
+                    detail="Tablero no encontrado"
+                )
+            raise
         
         if not response.data:
+            enrichment.cancel()
             raise HTTPException(
                 status_code=http_status.HTTP_400_BAD_REQUEST,
                 detail="No se pudo crear la tarea"
             )
         
-        task = response.data[0]
-        
-        if task_data.create_reminder and task_data.due_date:
-            try:
-                auto_reminder = {
-                    "user_id": user_id,
-                    "task_id": task["id"],
-                    "reminder_type": "before_due",
-                    "days_before": task_data.reminder_days_before,
-                    "reminder_time": task_data.reminder_time,
-                    "is_active": True
-                }
-                
-                reminder_result = supabase.table("reminders")\
-                    .insert(auto_reminder)\
-                    .execute()
-                
-                if reminder_result.data:
-                    print(f"Recordatorio automático creado: {reminder_result.data[0]['id']}")
-                
-            except Exception as e:
-                print(f"Error al crear recordatorio automático: {e}")
+        # Una función que devuelve una sola fila llega como objeto, no como lista
+        task = response.data[0] if isinstance(response.data, list) else response.data
         
-        # Enriquecer datos
-        enriched_task = await enrich_task_data(task, supabase)
+        await invalidate_task_lists(user_id)
         
-        return enriched_task
+        # Enriquecer datos
+        boards_map, assignees_map = await enrichment
+        return ORJSONResponse(
+            enrich_task_data_sync(task, boards_map, assignees_map),
+            status_code=http_status.HTTP_201_CREATED
+        )
         
     except HTTPException:
         raise
-    except Exception as e:
-        #print(f"Error al crear tarea: {str(e)}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Error al crear tarea")
         raise HTTPException(
             status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
+            detail="Error al crear tarea"
         )
 
 
-@router.get("/{task_id}", response_model=TaskResponse)
+@router.get(
+    "/{task_id}",
+    response_model=None,
+    response_class=ORJSONResponse,
+    responses={200: {"model": TaskResponse}}
+)
 async def get_task(
     task_id: int,
     user_id: str = Depends(get_current_user_id),
-    supabase: Client = Depends(get_service_supabase)
+    supabase: Client = Depends(get_service_supabase),
+    pool: Optional[asyncpg.Pool] = Depends(get_pg_pool)
 ):
     """Obtiene una tarea específica por su ID."""
     try:
-        response = supabase.table("tasks").select("*").eq("id", task_id).eq("user_id", user_id).single().execute()
+        if pool is not None:
+            task = await pg_fetch_task(pool, user_id, task_id)
+        else:
+            response = await run_query(supabase.table("tasks").select(TASK_COLUMNS).eq("id", task_id).eq("user_id", user_id).single())
+            task = response.data
         
-        if not response.data:
+        if not task:
             raise HTTPException(
                 status_code=http_status.HTTP_404_NOT_FOUND,
                 detail="Tarea no encontrada"
             )
         
-        # Enriquecer datos
-        task = await enrich_task_data(response.data, supabase)
+        if pool is not None:
+            return ORJSONResponse(task)
         
-        return task
+        # Enriquecer datos
+        return ORJSONResponse(await enrich_task_data(task, supabase))
         
     except HTTPException:
         raise
-    except Exception as e:
-        #print(f"Error al obtener tarea: {str(e)}")
+    except Exception:
+        logger.exception("Error al obtener tarea")
         raise HTTPException(
             status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al obtener tarea: {str(e)}"
+            detail="Error al obtener tarea"
         )
 
 
-@router.put("/{task_id}", response_model=TaskResponse)
+@router.put(
+    "/{task_id}",
+    response_model=None,
+    response_class=ORJSONResponse,
+    responses={200: {"model": TaskResponse}}
+)
 async def update_task(
     task_id: int,
     task_data: TaskUpdate,
@@ -244,22 +591,8 @@ async def update_task(
 ):
     """Actualiza una tarea existente."""
     try:
-        #print(f"=== UPDATE TASK {task_id} ===")
-        #print(f"Datos recibidos: {task_data.model_dump(exclude_unset=True)}")
-        
-        # Verificar que la tarea existe
-        task_check = supabase.table("tasks").select("*").eq("id", task_id).eq("user_id", user_id).execute()
-        
-        if not task_check.data:
-            raise HTTPException(
-                status_code=http_status.HTTP_404_NOT_FOUND,
-                detail="Tarea no encontrada"
-            )
-        
-        #print(f"Tarea actual en DB: status={task_check.data[0].get('status')}")
-        
         # Construir update solo con campos que fueron enviados
-        update_data = task_data.model_dump(exclude_unset=True)
+        update_data = task_data.changes()
         
         # Lógica especial para status=done
         if update_data.get("status") == "done":
@@ -271,43 +604,48 @@ async def update_task(
                 detail="No se proporcionaron campos para actualizar"
             )
         
-        #print(f"Datos a actualizar en DB: {update_data}")
-        
-        # Actualizar en base de datos
-        response = supabase.table("tasks").update(update_data).eq("id", task_id).execute()
+        # Update condicional: solo afecta la fila si pertenece al usuario
+        response = await run_query(
+            supabase.table("tasks")
+            .update(update_data)
+            .eq("id", task_id)
+            .eq("user_id", user_id)
+        )
         
         if not response.data:
             raise HTTPException(
-                status_code=http_status.HTTP_400_BAD_REQUEST,
-                detail="No se pudo actualizar la tarea"
+                status_code=http_status.HTTP_404_NOT_FOUND,
+                detail="Tarea no encontrada"
             )
         
-        #print(f"Tarea actualizada en DB: status={response.data[0].get('status')}")
+        await invalidate_task_lists(user_id)
         
         # Enriquecer datos
         task = await enrich_task_data(response.data[0], supabase)
         
-        return task
+        return ORJSONResponse(task)
         
     except HTTPException:
         raise
     except ValidationError as e:
-        #print(f"Error de validación: {e}")
         raise HTTPException(
             status_code=http_status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail=f"Error de validación: {e.errors()}"
         )
-    except Exception as e:
-        #print(f"Error al actualizar tarea: {str(e)}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Error al actualizar tarea")
         raise HTTPException(
             status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
+            detail="Error al actualizar tarea"
         )
 
 
-@router.patch("/{task_id}/status", response_model=TaskResponse)
+@router.patch(
+    "/{task_id}/status",
+    response_model=None,
+    response_class=ORJSONResponse,
+    responses={200: {"model": TaskResponse}}
+)
 async def update_task_status(
     task_id: int,
     status_data: TaskStatusUpdate,
@@ -316,29 +654,36 @@ async def update_task_status(
 ):
     """Cambia solo el status."""
     try:
-        task_check = supabase.table("tasks").select("id").eq("id", task_id).eq("user_id", user_id).execute()
+        update_data = {"status": status_data.status}
+        if status_data.status == "done":
+            update_data["completed"] = True
         
-        if not task_check.data:
+        response = await run_query(
+            supabase.table("tasks")
+            .update(update_data)
+            .eq("id", task_id)
+            .eq("user_id", user_id)
+        )
+        
+        if not response.data:
             raise HTTPException(
                 status_code=http_status.HTTP_404_NOT_FOUND,
                 detail="Tarea no encontrada"
             )
         
-        update_data = {"status": status_data.status}
-        if status_data.status == "done":
-            update_data["completed"] = True
+        await invalidate_task_lists(user_id)
         
-        response = supabase.table("tasks").update(update_data).eq("id", task_id).execute()
         task = await enrich_task_data(response.data[0], supabase)
         
-        return task
+        return ORJSONResponse(task)
         
     except HTTPException:
         raise
-    except Exception as e:
+    except Exception:
+        logger.exception("Error al actualizar estado de la tarea")
         raise HTTPException(
             status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
+            detail="Error al actualizar estado de la tarea"
         )
 
 
@@ -350,35 +695,60 @@ async def delete_task(
 ):
     """Elimina una tarea."""
     try:
-        task_check = supabase.table("tasks").select("id").eq("id", task_id).eq("user_id", user_id).execute()
+        # Borrado condicional: si no devuelve filas, la tarea no existía
+        # o no es del usuario
+        response = await run_query(
+            supabase.table("tasks")
+            .delete()
+            .eq("id", task_id)
+            .eq("user_id", user_id)
+        )
         
-        if not task_check.data:
+        if not response.data:
             raise HTTPException(
                 status_code=http_status.HTTP_404_NOT_FOUND,
                 detail="Tarea no encontrada"
             )
         
-        supabase.table("tasks").delete().eq("id", task_id).execute()
+        await invalidate_task_lists(user_id)
+        await forget_owner("task", user_id, task_id)
+        
         return None
         
     except HTTPException:
         raise
-    except Exception as e:
+    except Exception:
+        logger.exception("Error al eliminar tarea")
         raise HTTPException(
             status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
+            detail="Error al eliminar tarea"
         )
 
 
-@router.get("/board/{board_id}", response_model=List[TaskResponse])
+@router.get(
+    "/board/{board_id}",
+    response_model=None,
+    response_class=ORJSONResponse,
+    responses={200: {"model": List[TaskResponse]}}
+)
 async def get_tasks_by_board(
     board_id: int,
     user_id: str = Depends(get_current_user_id),
-    supabase: Client = Depends(get_service_supabase)
+    supabase: Client = Depends(get_service_supabase),
+    pool: Optional[asyncpg.Pool] = Depends(get_pg_pool)
 ):
     """Obtiene tareas de un board."""
     try:
-        board_check = supabase.table("boards").select("id").eq("id", board_id).eq("user_id", user_id).execute()
+        if pool is not None:
+            tasks = await pg_fetch_board_tasks(pool, user_id, board_id)
+            if tasks is None:
+                raise HTTPException(
+                    status_code=http_status.HTTP_404_NOT_FOUND,
+                    detail="Tablero no encontrado"
+                )
+            return ORJSONResponse(tasks)
+        
+        board_check = await run_query(supabase.table("boards").select("id").eq("id", board_id).eq("user_id", user_id))
         
         if not board_check.data:
             raise HTTPException(
@@ -386,25 +756,77 @@ async def get_tasks_by_board(
                 detail="Tablero no encontrado"
             )
         
-        response = supabase.table("tasks").select("*").eq("board_id", board_id).order("created_at", desc=False).execute()
+        response = await run_query(supabase.table("tasks").select(TASK_COLUMNS).eq("board_id", board_id).order("created_at", desc=False))
         
-        enriched_tasks = []
-        for task in response.data:
-            enriched_task = await enrich_task_data(task, supabase)
-            enriched_tasks.append(enriched_task)
-        
-        return enriched_tasks
+        return ORJSONResponse(await enrich_tasks(response.data, supabase))
         
     except HTTPException:
         raise
-    except Exception as e:
+    except Exception:
+        logger.exception("Error al obtener tareas del tablero")
         raise HTTPException(
             status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
+            detail="Error al obtener tareas del tablero"
         )
 
 
-@router.patch("/{task_id}/move", response_model=TaskResponse)
+@router.post(
+    "/batch-update",
+    response_model=None,
+    response_class=ORJSONResponse,
+    responses={200: {"model": List[TaskResponse]}}
+)
+async def batch_update_tasks(
+    items: List[TaskBatchItem],
+    user_id: str = Depends(get_current_user_id),
+    supabase: Client = Depends(get_service_supabase)
+):
+    """
+    Actualiza varias tareas en un solo request (drag & drop, cambios en bloque).
+    Retorna solo las tareas del usuario que fueron actualizadas.
+    """
+    if not items or len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail=f"Envía entre 1 y {MAX_BATCH_SIZE} tareas"
+        )
+    
+    payload = []
+    for item in items:
+        # status, priority y completed son NOT NULL: un null enviado se ignora.
+        # board_id sí admite null (sacar la tarea del board)
+        changes = {
+            field: value
+            for field, value in item.model_dump(exclude_unset=True).items()
+            if value is not None or field == "board_id"
+        }
+        if changes.get("status") == "done":
+            changes["completed"] = True
+        payload.append(changes)
+    
+    try:
+        response = await run_query(
+            supabase.rpc("batch_update_tasks", {"p_user_id": user_id, "p_items": payload})
+        )
+    except APIError as e:
+        if e.code == PG_FK_VIOLATION:
+            raise HTTPException(
+                status_code=http_status.HTTP_404_NOT_FOUND,
+                detail="Tablero destino no encontrado"
+            )
+        raise api_error_to_http(e, "Tarea no encontrada", "Error al actualizar tareas")
+    
+    await invalidate_task_lists(user_id)
+    
+    return ORJSONResponse(await enrich_tasks(response.data, supabase))
+
+
+@router.patch(
+    "/{task_id}/move",
+    response_model=None,
+    response_class=ORJSONResponse,
+    responses={200: {"model": TaskResponse}}
+)
 async def move_task_to_board(
     task_id: int,
     move_data: TaskMoveRequest,
@@ -413,73 +835,43 @@ async def move_task_to_board(
 ):
     """Mueve una tarea a otro tablero o a 'sin tablero'."""
     try:
-        # Verificar que la tarea existe
-        task_check = supabase.table("tasks")\
-            .select("id, title, board_id")\
-            .eq("id", task_id)\
-            .eq("user_id", user_id)\
-            .execute()
-        
-        if not task_check.data:
-            raise HTTPException(
-                status_code=http_status.HTTP_404_NOT_FOUND,
-                detail="Tarea no encontrada"
+        # Update condicional: si la tarea no es del usuario no se toca ninguna fila.
+        # La FK (board_id, user_id) -> boards rechaza un board destino ajeno o inexistente
+        update_data = {"board_id": move_data.board_id}
+        
+        try:
+            response = await run_query(
+                supabase.table("tasks")
+                .update(update_data)
+                .eq("id", task_id)
+                .eq("user_id", user_id)
             )
-        
-        current_task = task_check.data[0]
-        old_board_id = current_task.get("board_id")
-        new_board_id = move_data.board_id
-        
-        # Si el board_id es el mismo, no hacer nada
-        if old_board_id == new_board_id:
-            enriched_task = await enrich_task_data(current_task, supabase)
-            return enriched_task
-        
-        # Verificar nuevo board si existe
-        if new_board_id is not None:
-            board_check = supabase.table("boards")\
-                .select("id, name")\
-                .eq("id", new_board_id)\
-                .eq("user_id", user_id)\
-                .execute()
-            
-            if not board_check.data:
+        except APIError as e:
+            if e.code == PG_FK_VIOLATION:
                 raise HTTPException(
                     status_code=http_status.HTTP_404_NOT_FOUND,
                     detail="Tablero destino no encontrado"
                 )
-            
-            new_board_name = board_check.data[0]["name"]
-        else:
-            new_board_name = "sin tablero"
-        
-        # Actualizar el board_id
-        update_data = {"board_id": new_board_id}
-        
-        response = supabase.table("tasks")\
-            .update(update_data)\
-            .eq("id", task_id)\
-            .execute()
+            raise
         
         if not response.data:
             raise HTTPException(
-                status_code=http_status.HTTP_400_BAD_REQUEST,
-                detail="No se pudo mover la tarea"
+                status_code=http_status.HTTP_404_NOT_FOUND,
+                detail="Tarea no encontrada"
             )
         
+        await invalidate_task_lists(user_id)
+        
         # Enriquecer datos
         updated_task = await enrich_task_data(response.data[0], supabase)
         
-        old_board_text = f"tablero {old_board_id}" if old_board_id else "sin tablero"
-        #print(f"Tarea '{current_task['title']}' movida de {old_board_text} a {new_board_name}")
-        
-        return updated_task
+        return ORJSONResponse(updated_task)
         
     except HTTPException:
         raise
-    except Exception as e:
-        #print(f"Error al mover tarea: {str(e)}")
+    except Exception:
+        logger.exception("Error al mover tarea")
         raise HTTPException(
             status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al mover tarea: {str(e)}"
+            detail="Error al mover tarea"
         )
\ No newline at end of file
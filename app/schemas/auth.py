@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from typing import Optional, List
 from datetime import datetime
+from app.schemas.boards import BoardWithTaskCount
 
 
 # =====================================================
@@ -14,8 +15,8 @@ class RegisterRequest(BaseModel):
     full_name: Optional[str] = Field(None, description="Nombre completo del usuario")
     phone: Optional[str] = Field(None, description="Número de teléfono del usuario")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "email": "usuario@ejemplo.com",
                 "password": "miPassword123",
@@ -23,6 +24,7 @@ class RegisterRequest(BaseModel):
                 "phone": "+504 9999-9999"
             }
         }
+    )
 
 
 class LoginRequest(BaseModel):
@@ -30,25 +32,27 @@ class LoginRequest(BaseModel):
     email: EmailStr = Field(..., description="Email del usuario")
     password: str = Field(..., description="Contraseña")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "email": "usuario@ejemplo.com",
                 "password": "miPassword123"
             }
         }
+    )
 
 
 class RefreshTokenRequest(BaseModel):
     """Schema para renovar el access token usando refresh token"""
     refresh_token: str = Field(..., description="Refresh token válido")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "refresh_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9..."
             }
         }
+    )
 
 
 class UpdateProfileRequest(BaseModel):
@@ -57,14 +61,15 @@ class UpdateProfileRequest(BaseModel):
     phone: Optional[str] = Field(None, description="Número de teléfono")
     avatar_url: Optional[str] = Field(None, description="URL del avatar")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "full_name": "Juan Pérez Actualizado",
                 "phone": "+504 8888-8888",
                 "avatar_url": "https://ejemplo.com/avatar.jpg"
             }
         }
+    )
 
 
 # =====================================================
@@ -80,8 +85,9 @@ class UserResponse(BaseModel):
     avatar_url: Optional[str] = None
     created_at: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(
+        from_attributes=True
+    )
 
 
 class AuthResponse(BaseModel):
@@ -91,9 +97,10 @@ class AuthResponse(BaseModel):
     token_type: str = Field(default="bearer", description="Tipo de token")
     expires_in: int = Field(..., description="Segundos hasta que expire el access token")
     user: UserResponse = Field(..., description="Información del usuario")
+    boards: Optional[List[BoardWithTaskCount]] = Field(None, description="Boards del usuario (solo en /refresh con include_boards=true)")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "access_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
                 "refresh_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
@@ -109,6 +116,7 @@ class AuthResponse(BaseModel):
                 }
             }
         }
+    )
 
 
 class ErrorResponse(BaseModel):
@@ -117,23 +125,25 @@ class ErrorResponse(BaseModel):
     message: str = Field(..., description="Mensaje descriptivo del error")
     details: Optional[dict] = Field(None, description="Detalles adicionales del error")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "error": "authentication_error",
                 "message": "Credenciales inválidas",
                 "details": None
             }
         }
+    )
 
 
 class MessageResponse(BaseModel):
     """Schema para mensajes simples"""
     message: str = Field(..., description="Mensaje de respuesta")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "message": "Operación exitosa"
             }
-        }
\ No newline at end of file
+        }
+    )
\ No newline at end of file
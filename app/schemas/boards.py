@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 from datetime import datetime
 
@@ -14,8 +14,8 @@ class BoardCreate(BaseModel):
     icon: str = Field(default="📊", description="Icono del tablero (emoji)")
     type: str = Field(default="personal", description="Tipo: personal o team")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "name": "Lanzamiento Web",
                 "color": "#52C41A",
@@ -23,6 +23,7 @@ class BoardCreate(BaseModel):
                 "type": "personal"
             }
         }
+    )
 
 
 class BoardUpdate(BaseModel):
@@ -32,13 +33,14 @@ class BoardUpdate(BaseModel):
     icon: Optional[str] = None
     type: Optional[str] = None
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "name": "Lanzamiento Web - Actualizado",
                 "color": "#9254DE"
             }
         }
+    )
 
 
 # =====================================================
@@ -56,9 +58,9 @@ class BoardResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
-        json_schema_extra = {
+    model_config = ConfigDict(
+        from_attributes=True,
+        json_schema_extra={
             "example": {
                 "id": 1,
                 "user_id": "550e8400-e29b-41d4-a716-446655440000",
@@ -70,14 +72,15 @@ class BoardResponse(BaseModel):
                 "updated_at": "2024-01-15T10:30:00"
             }
         }
+    )
 
 
 class BoardWithTaskCount(BoardResponse):
     """Board con conteo de tareas"""
     task_count: int = Field(default=0, description="Número de tareas en el tablero")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "id": 1,
                 "user_id": "550e8400-e29b-41d4-a716-446655440000",
@@ -89,4 +92,5 @@ class BoardWithTaskCount(BoardResponse):
                 "created_at": "2024-01-15T10:30:00",
                 "updated_at": "2024-01-15T10:30:00"
             }
-        }
\ No newline at end of file
+        }
+    )
\ No newline at end of file
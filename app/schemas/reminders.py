@@ -1,8 +1,11 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from typing import Optional, List, Literal
 from datetime import datetime
 
 
+ReminderType = Literal["daily", "before_due", "on_due"]
+
+
 # =====================================================
 # REQUEST SCHEMAS
 # =====================================================
@@ -10,13 +13,20 @@ from datetime import datetime
 class ReminderCreate(BaseModel):
     """Schema para crear un recordatorio"""
     task_id: int = Field(..., description="ID de la tarea")
-    reminder_type: str = Field(..., description="daily, before_due, on_due")
+    reminder_type: ReminderType = Field(..., description="daily, before_due, on_due")
     days_before: Optional[int] = Field(None, description="Días antes (before_due)")
     time: Optional[str] = Field(None, description="Hora HH:MM")
     is_active: bool = Field(default=True)
     
-    class Config:
-        json_schema_extra = {
+    @model_validator(mode="after")
+    def check_days_before(self) -> "ReminderCreate":
+        """days_before es obligatorio para recordatorios before_due"""
+        if self.reminder_type == "before_due" and not self.days_before:
+            raise ValueError("days_before requerido para 'before_due'")
+        return self
+    
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "task_id": 1,
                 "reminder_type": "before_due",
@@ -25,21 +35,23 @@ class ReminderCreate(BaseModel):
                 "is_active": True
             }
         }
+    )
 
 
 class ReminderUpdate(BaseModel):
     """Schema para actualizar recordatorio"""
-    reminder_type: Optional[str] = None
+    reminder_type: Optional[ReminderType] = None
     days_before: Optional[int] = None
     time: Optional[str] = None
     is_active: Optional[bool] = None
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "is_active": False
             }
         }
+    )
 
 
 # =====================================================
@@ -64,8 +76,9 @@ class ReminderResponse(BaseModel):
     task_due_date: Optional[str] = None
     days_until_due: Optional[int] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(
+        from_attributes=True
+    )
 
 
 class NotificationResponse(BaseModel):
@@ -80,5 +93,11 @@ class NotificationResponse(BaseModel):
     is_read: bool
     created_at: datetime
     
-    class Config:
-        from_attributes = True
\ No newline at end of file
+    model_config = ConfigDict(
+        from_attributes=True
+    )
+
+
+class UnreadCountResponse(BaseModel):
+    """Schema para el contador de notificaciones no leídas"""
+    count: int = Field(..., description="Número de notificaciones no leídas")
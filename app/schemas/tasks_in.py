@@ -0,0 +1,164 @@
+from pydantic import AfterValidator, BaseModel, BeforeValidator, ConfigDict, Field
+from typing import Annotated, Optional, Literal
+from datetime import date
+
+
+# Prioridades válidas de una tarea
+TaskPriority = Literal["Alta", "Media", "Baja"]
+
+
+def normalize_time(v: str) -> str:
+    """Normaliza el formato de tiempo a HH:MM"""
+    # Si viene como HH:MM:SS, convertir a HH:MM
+    if len(v) == 8 and v[2] == ':' and v[5] == ':':
+        return v[:5]
+    return v
+
+
+# Hora "HH:MM" (acepta también "HH:MM:SS")
+TimeStr = Annotated[str, AfterValidator(normalize_time)]
+
+
+def strip_time(v):
+    """
+    Acepta también un datetime ISO ("2024-10-12T00:00:00") y se queda con
+    la fecha. Un string vacío equivale a no tener fecha.
+    """
+    if isinstance(v, str):
+        if not v:
+            return None
+        if "T" in v:
+            return v.split("T", 1)[0]
+    return v
+
+
+# Fecha opcional "YYYY-MM-DD"
+DueDate = Annotated[Optional[date], BeforeValidator(strip_time)]
+
+
+# =====================================================
+# EJEMPLOS (OpenAPI)
+# Se definen una sola vez y los schemas solo los referencian
+# =====================================================
+
+_TASK_CREATE_EXAMPLE = {
+    "title": "Rediseñar Landing Page",
+    "description": "Actualizar diseño",
+    "board_id": 1,
+    "priority": "Alta",
+    "status": "todo",
+    "status_badge": "Testing",
+    "due_date": "2024-10-12",
+    "due_time": "14:00",
+    "create_reminder": True,
+    "reminder_days_before": 1,
+    "reminder_time": "09:00"
+}
+
+_TASK_UPDATE_EXAMPLE = {
+    "title": "Rediseñar Landing Page - Actualizado",
+    "status": "progress",
+    "status_badge": "Testing",
+    "priority": "Media",
+    "due_time": "15:00"
+}
+
+_TASK_BATCH_ITEM_EXAMPLE = {
+    "id": 1,
+    "status": "done"
+}
+
+_TASK_STATUS_UPDATE_EXAMPLE = {
+    "status": "progress"
+}
+
+_TASK_MOVE_EXAMPLE = {
+    "board_id": 5
+}
+
+
+# =====================================================
+# REQUEST SCHEMAS
+# =====================================================
+
+class TaskCreate(BaseModel):
+    """Schema para crear una tarea"""
+    title: str = Field(..., min_length=1, max_length=200)
+    description: Optional[str] = None
+    board_id: Optional[int] = None
+    priority: TaskPriority = "Media"
+    status: Literal["todo", "progress", "done"] = "todo"
+    status_badge: Optional[str] = None
+    status_badge_color: Optional[str] = "#9254DE"
+    assignee_id: Optional[str] = None
+    due_date: DueDate = None
+    due_time: Optional[TimeStr] = "09:00"
+    
+    # Configuración de recordatorio automático
+    create_reminder: bool = True
+    reminder_days_before: int = 1
+    reminder_time: TimeStr = "09:00"
+    
+    model_config = ConfigDict(
+        json_schema_extra={"example": _TASK_CREATE_EXAMPLE}
+    )
+
+
+class TaskUpdate(BaseModel):
+    """Schema para actualizar una tarea"""
+    title: Optional[str] = Field(None, min_length=1, max_length=200)
+    description: Optional[str] = None
+    board_id: Optional[int] = None
+    priority: Optional[TaskPriority] = None
+    status: Optional[Literal["todo", "progress", "done"]] = None
+    status_badge: Optional[str] = None
+    status_badge_color: Optional[str] = None
+    assignee_id: Optional[str] = None
+    due_date: DueDate = None
+    due_time: Optional[TimeStr] = None
+    completed: Optional[bool] = None
+    
+    model_config = ConfigDict(
+        json_schema_extra={"example": _TASK_UPDATE_EXAMPLE}
+    )
+    
+    def changes(self) -> dict:
+        """
+        Solo los campos enviados en el request, listos para el UPDATE.
+        Lee model_fields_set directamente en lugar de pasar por el
+        serializador con exclude_unset.
+        """
+        data = {field: getattr(self, field) for field in self.model_fields_set}
+        if data.get("due_date") is not None:
+            data["due_date"] = data["due_date"].isoformat()
+        return data
+
+
+class TaskBatchItem(BaseModel):
+    """Cambios de una tarea dentro de un batch (solo se aplican los campos enviados)"""
+    id: int
+    status: Optional[Literal["todo", "progress", "done"]] = None
+    board_id: Optional[int] = None
+    priority: Optional[TaskPriority] = None
+    completed: Optional[bool] = None
+    
+    model_config = ConfigDict(
+        json_schema_extra={"example": _TASK_BATCH_ITEM_EXAMPLE}
+    )
+
+
+class TaskStatusUpdate(BaseModel):
+    """Schema para cambiar solo el status (para drag & drop)"""
+    status: Literal["todo", "progress", "done"] = Field(..., description="Nuevo estado: todo, progress, done")
+    
+    model_config = ConfigDict(
+        json_schema_extra={"example": _TASK_STATUS_UPDATE_EXAMPLE}
+    )
+
+
+class TaskMoveRequest(BaseModel):
+    board_id: Optional[int] = None
+    
+    model_config = ConfigDict(
+        json_schema_extra={"example": _TASK_MOVE_EXAMPLE}
+    )
\ No newline at end of file
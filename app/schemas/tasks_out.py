@@ -0,0 +1,125 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, List
+from typing_extensions import TypedDict
+from datetime import datetime, date
+
+
+# =====================================================
+# EJEMPLOS (OpenAPI)
+# Se definen una sola vez y los schemas solo los referencian
+# =====================================================
+
+_ASSIGNEE_EXAMPLE = {
+    "id": "uuid-del-usuario",
+    "name": "Juan Pérez",
+    "avatar": "https://i.pravatar.cc/150?img=1"
+}
+
+_TASK_RESPONSE_EXAMPLE = {
+    "id": 1,
+    "user_id": "uuid-del-usuario",
+    "board_id": 1,
+    "title": "Rediseñar Landing Page",
+    "description": "Actualizar el diseño de la página principal",
+    "priority": "Alta",
+    "status": "todo",
+    "status_badge": "Diseño",
+    "status_badge_color": "#9254DE",
+    "assignee_id": None,
+    "due_date": "2024-10-12",
+    "due_time": "14:00",
+    "completed": False,
+    "created_at": "2024-01-15T10:30:00",
+    "updated_at": "2024-01-15T10:30:00",
+    "board": "Lanzamiento Web",
+    "assignee": _ASSIGNEE_EXAMPLE
+}
+
+_TASK_LIST_EXAMPLE = {
+    "tasks": [],
+    "total": 10,
+    "page": 1,
+    "page_size": 50,
+    "has_next": True,
+    "next_cursor": {
+        "created_at": "2024-01-15T10:30:00",
+        "id": 42
+    }
+}
+
+
+# =====================================================
+# RESPONSE SCHEMAS
+# Los endpoints devuelven las filas directo (response_model=None); estos
+# schemas solo se usan para documentar, por eso difieren su construcción
+# (defer_build) hasta que alguien genere el OpenAPI
+# =====================================================
+
+class AssigneeDict(TypedDict):
+    """
+    Usuario asignado. TypedDict en lugar de modelo anidado: se arma como
+    dict plano en el router y se serializa sin instanciar nada.
+    """
+    id: str
+    name: str
+    avatar: Optional[str]
+    
+    __pydantic_config__ = ConfigDict(
+        json_schema_extra={"example": _ASSIGNEE_EXAMPLE}
+    )
+
+
+class TaskResponse(BaseModel):
+    """Schema para respuesta de una tarea"""
+    id: int
+    user_id: str
+    board_id: Optional[int] = None
+    title: str
+    description: Optional[str] = None
+    priority: str
+    status: str
+    status_badge: Optional[str] = None
+    status_badge_color: Optional[str] = None
+    assignee_id: Optional[str] = None
+    due_date: Optional[date] = None
+    due_time: Optional[str] = None 
+    completed: bool
+    created_at: datetime
+    updated_at: datetime
+    
+    # Campos adicionales computados
+    board: Optional[str] = None
+    assignee: Optional[AssigneeDict] = None
+    # Solo con GET /tasks?shared_assignees=true (reemplaza a assignee)
+    assignee_idx: Optional[int] = None
+    
+    model_config = ConfigDict(
+        from_attributes=True,
+        defer_build=True,
+        json_schema_extra={"example": _TASK_RESPONSE_EXAMPLE}
+    )
+
+
+class TaskCursor(BaseModel):
+    """Cursor de paginación: última tarea de la página (created_at, id)"""
+    created_at: datetime
+    id: int
+    
+    model_config = ConfigDict(defer_build=True)
+
+
+class TaskListResponse(BaseModel):
+    """Schema para lista de tareas con metadatos"""
+    tasks: List[TaskResponse]
+    total: int
+    page: int = 1
+    page_size: int = 50
+    has_next: bool = False
+    next_cursor: Optional[TaskCursor] = None
+    # Solo con shared_assignees=true: asignados únicos de la página
+    assignees: Optional[List[AssigneeDict]] = None
+    
+    model_config = ConfigDict(
+        defer_build=True,
+        json_schema_extra={"example": _TASK_LIST_EXAMPLE}
+    )
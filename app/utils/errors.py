@@ -0,0 +1,32 @@
+from fastapi import HTTPException, status
+from postgrest.exceptions import APIError
+import logging
+
+
+logger = logging.getLogger("app")
+
+# Código de PostgREST cuando .single() no encuentra filas
+PGRST_NO_ROWS = "PGRST116"
+
+# Código de Postgres para foreign_key_violation
+PG_FK_VIOLATION = "23503"
+
+
+def api_error_to_http(error: APIError, not_found_detail: str, detail: str) -> HTTPException:
+    """
+    Traduce un APIError de PostgREST a HTTPException.
+    "Sin filas" es un 404 normal; el resto se loguea y se devuelve un 500
+    genérico sin exponer el mensaje interno.
+    Llamar dentro del bloque except para que el log incluya el traceback.
+    """
+    if error.code == PGRST_NO_ROWS:
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=not_found_detail
+        )
+    
+    logger.exception(detail)
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=detail
+    )
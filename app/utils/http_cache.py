@@ -0,0 +1,82 @@
+from fastapi import Request, Response
+from supabase import Client
+from app.database import run_query
+from typing import Optional, Tuple
+import hashlib
+
+
+# Tiempo que el cliente puede reutilizar la respuesta sin revalidar
+DEFAULT_MAX_AGE = 10
+
+
+def build_etag(*parts) -> str:
+    """
+    Construye un ETag débil a partir de los valores que identifican
+    la versión de un recurso (id del dueño, updated_at, conteos...).
+    """
+    raw = "|".join("" if part is None else str(part) for part in parts)
+    digest = hashlib.md5(raw.encode("utf-8")).hexdigest()
+    return f'W/"{digest}"'
+
+
+def cache_headers(etag: str, max_age: int = DEFAULT_MAX_AGE) -> dict:
+    """Headers de caché HTTP para respuestas privadas del usuario"""
+    return {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={max_age}"
+    }
+
+
+def not_modified_response(
+    request: Request,
+    etag: str,
+    max_age: int = DEFAULT_MAX_AGE
+) -> Optional[Response]:
+    """Retorna un 304 si el If-None-Match del cliente coincide, sino None"""
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=cache_headers(etag, max_age))
+    return None
+
+
+def check_not_modified(
+    request: Request,
+    response: Response,
+    etag: str,
+    max_age: int = DEFAULT_MAX_AGE
+) -> Optional[Response]:
+    """
+    Agrega ETag y Cache-Control a la respuesta.
+    Si el cliente envía un If-None-Match que coincide, retorna un 304
+    listo para devolver; en caso contrario retorna None.
+    
+    Para endpoints que retornan un Response propio (ORJSONResponse),
+    usar not_modified_response + cache_headers directamente.
+    """
+    not_modified = not_modified_response(request, etag, max_age)
+    if not_modified:
+        return not_modified
+    
+    response.headers.update(cache_headers(etag, max_age))
+    return None
+
+
+async def fetch_change_marker(
+    supabase: Client,
+    table: str,
+    user_id: str,
+    column: str = "updated_at"
+) -> Tuple[int, Optional[str]]:
+    """
+    Huella liviana de las filas del usuario en una tabla: total de filas
+    y el valor más reciente de `column`. Cubre altas, bajas y cambios
+    trayendo a lo sumo una fila.
+    """
+    response = await run_query(
+        supabase.table(table)
+        .select(column, count="exact")
+        .eq("user_id", user_id)
+        .order(column, desc=True)
+        .limit(1)
+    )
+    latest = response.data[0].get(column) if response.data else None
+    return response.count or 0, latest
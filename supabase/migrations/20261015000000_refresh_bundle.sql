@@ -0,0 +1,26 @@
+-- =====================================================
+-- refresh_bundle: perfil del usuario + boards con conteo de tareas
+-- Usado por POST /auth/refresh para resolver todo en un solo round-trip
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION public.refresh_bundle(uid uuid)
+RETURNS json
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT json_build_object(
+        'user', row_to_json(u),
+        'boards', coalesce((
+            SELECT json_agg(b ORDER BY b.created_at DESC)
+            FROM (
+                SELECT
+                    bo.*,
+                    (SELECT count(*) FROM public.tasks t WHERE t.board_id = bo.id) AS task_count
+                FROM public.boards bo
+                WHERE bo.user_id = uid
+            ) b
+        ), '[]'::json)
+    )
+    FROM public.users u
+    WHERE u.id = uid
+$$;
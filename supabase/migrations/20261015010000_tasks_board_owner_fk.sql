@@ -0,0 +1,52 @@
+-- =====================================================
+-- FK compuesta tasks(board_id, user_id) -> boards(id, user_id)
+-- Permite que POST /tasks y PATCH /tasks/{id}/move inserten o muevan
+-- sin consultar antes el board: si el board no existe o es de otro
+-- usuario, el INSERT/UPDATE falla con 23503 (foreign_key_violation)
+--
+-- Requiere Postgres 15+ (ON DELETE SET NULL con lista de columnas).
+-- Reemplaza a la FK simple tasks(board_id) -> boards(id): la compuesta ya
+-- valida que el board exista, y tener ambas aplicaría dos acciones
+-- ON DELETE sobre la misma columna.
+--
+-- Cambio de datos: las tareas asociadas a un board inexistente o de otro
+-- usuario quedan sin board (board_id = NULL). La cantidad se informa con
+-- un NOTICE.
+-- La validación de las filas existentes va en la migración siguiente
+-- (20261015010500) para no retener este lock mientras se recorre tasks.
+-- =====================================================
+
+ALTER TABLE public.boards
+    ADD CONSTRAINT boards_id_user_id_key UNIQUE (id, user_id);
+
+ALTER TABLE public.tasks
+    DROP CONSTRAINT IF EXISTS tasks_board_id_fkey;
+
+-- Tareas que apuntan a un board inexistente o de otro usuario quedan sin
+-- board; si no, la validación de la FK fallaría
+DO $$
+DECLARE
+    detached integer;
+BEGIN
+    UPDATE public.tasks t
+    SET board_id = NULL
+    WHERE t.board_id IS NOT NULL
+      AND NOT EXISTS (
+          SELECT 1 FROM public.boards b
+          WHERE b.id = t.board_id AND b.user_id = t.user_id
+      );
+    GET DIAGNOSTICS detached = ROW_COUNT;
+    RAISE NOTICE 'tasks_board_owner_fkey: % tareas quedaron sin board', detached;
+END
+$$;
+
+-- MATCH SIMPLE (por defecto): las tareas sin board (board_id NULL) no se validan.
+-- Al borrar un board solo se anula board_id; user_id se conserva.
+-- NOT VALID: aplica solo a filas nuevas o modificadas; las existentes
+-- se validan en 20261015010500_validate_tasks_board_owner_fk.sql
+ALTER TABLE public.tasks
+    ADD CONSTRAINT tasks_board_owner_fkey
+    FOREIGN KEY (board_id, user_id)
+    REFERENCES public.boards (id, user_id)
+    ON DELETE SET NULL (board_id)
+    NOT VALID;
@@ -0,0 +1,9 @@
+-- =====================================================
+-- Valida tasks_board_owner_fkey sobre las filas existentes
+-- Va en su propia migración (su propia transacción): VALIDATE CONSTRAINT
+-- solo toma SHARE UPDATE EXCLUSIVE, así tasks sigue aceptando escrituras
+-- mientras se recorre
+-- =====================================================
+
+ALTER TABLE public.tasks
+    VALIDATE CONSTRAINT tasks_board_owner_fkey;
@@ -0,0 +1,50 @@
+-- =====================================================
+-- create_task_with_reminder: inserta la tarea y, si corresponde,
+-- su recordatorio automático en una sola transacción
+-- Usado por POST /tasks para resolver todo en un solo round-trip
+--
+-- p_task llega como jsonb y se convierte con jsonb_populate_record,
+-- así cada campo toma el tipo real de la columna (due_date, due_time...)
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION public.create_task_with_reminder(
+    p_task jsonb,
+    p_create_reminder boolean DEFAULT false,
+    p_days_before integer DEFAULT 1,
+    p_reminder_time text DEFAULT '09:00'
+)
+RETURNS public.tasks
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    new_task public.tasks;
+BEGIN
+    INSERT INTO public.tasks (
+        user_id, title, description, board_id, priority, status,
+        status_badge, status_badge_color, assignee_id, due_date, due_time, completed
+    )
+    SELECT
+        r.user_id, r.title, r.description, r.board_id, r.priority, r.status,
+        r.status_badge, r.status_badge_color, r.assignee_id, r.due_date, r.due_time, r.completed
+    FROM jsonb_populate_record(NULL::public.tasks, p_task) r
+    RETURNING * INTO new_task;
+
+    IF p_create_reminder AND new_task.due_date IS NOT NULL THEN
+        INSERT INTO public.reminders (
+            user_id, task_id, reminder_type, days_before, reminder_time, is_active
+        )
+        SELECT
+            r.user_id, r.task_id, r.reminder_type, r.days_before, r.reminder_time, r.is_active
+        FROM jsonb_populate_record(NULL::public.reminders, jsonb_build_object(
+            'user_id', new_task.user_id,
+            'task_id', new_task.id,
+            'reminder_type', 'before_due',
+            'days_before', p_days_before,
+            'reminder_time', p_reminder_time,
+            'is_active', true
+        )) r;
+    END IF;
+
+    RETURN new_task;
+END;
+$$;
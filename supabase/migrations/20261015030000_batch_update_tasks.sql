@@ -0,0 +1,27 @@
+-- =====================================================
+-- batch_update_tasks: actualiza varias tareas del usuario en una
+-- sola sentencia. Usado por POST /tasks/batch-update (drag & drop,
+-- cambios de status en bloque)
+--
+-- p_items es un array jsonb de objetos {id, status?, board_id?, ...}.
+-- jsonb_populate_record(t, item) parte de la fila actual y solo
+-- reemplaza las claves presentes en el item, así cada tarea recibe
+-- únicamente sus campos enviados. Un upsert no sirve aquí: el INSERT
+-- parcial falla por NOT NULL antes de llegar al ON CONFLICT.
+-- Las tareas que no son del usuario simplemente no se tocan.
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION public.batch_update_tasks(p_user_id uuid, p_items jsonb)
+RETURNS SETOF public.tasks
+LANGUAGE sql
+AS $$
+    UPDATE public.tasks t
+    SET (status, board_id, priority, completed) = (
+        SELECT r.status, r.board_id, r.priority, r.completed
+        FROM jsonb_populate_record(t, item) r
+    )
+    FROM jsonb_array_elements(p_items) item
+    WHERE t.id = (item->>'id')::bigint
+      AND t.user_id = p_user_id
+    RETURNING t.*;
+$$;
@@ -0,0 +1,22 @@
+-- =====================================================
+-- Índices para los listados de tareas
+--
+-- idx_tasks_user_created: GET /tasks filtra por user_id y ordena por
+-- (created_at DESC, id DESC), también en la paginación por cursor.
+-- El INCLUDE deja los filtros opcionales dentro del índice.
+--
+-- idx_tasks_board: GET /tasks/board/{id} ordenado por created_at y el
+-- ON DELETE SET NULL de la FK al borrar un board.
+--
+-- Sin CONCURRENTLY: las migraciones se aplican dentro de una transacción.
+-- En una base con muchas tareas, crearlos a mano con CONCURRENTLY antes
+-- de aplicar esta migración (IF NOT EXISTS la vuelve un no-op).
+-- =====================================================
+
+CREATE INDEX IF NOT EXISTS idx_tasks_user_created
+    ON public.tasks (user_id, created_at DESC, id DESC)
+    INCLUDE (board_id, status, priority, completed);
+
+CREATE INDEX IF NOT EXISTS idx_tasks_board
+    ON public.tasks (board_id, created_at)
+    WHERE board_id IS NOT NULL;